@@ -0,0 +1,39 @@
+"""
+Memory allocated while enumerating a list twice under each cache policy.
+Run with
+
+    python -m benchmarks.caching
+
+The passthrough policy iterates list data directly and allocates nothing
+per element, lazy memoizes the list once and none never caches.
+"""
+import tracemalloc
+from py_linq import Enumerable
+
+
+def allocated(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def run(n):
+    data = list(range(n))
+    for policy in ['none', 'lazy', 'passthrough']:
+        enumerable = Enumerable(data, cache_policy=policy)
+
+        def enumerate_twice():
+            for _ in enumerable:
+                pass
+            for _ in enumerable:
+                pass
+
+        print(u"{0:<13}{1:>9}{2:>14} bytes".format(
+            policy, n, allocated(enumerate_twice)))
+
+
+if __name__ == '__main__':
+    for n in [10 ** 4, 10 ** 6]:
+        run(n)
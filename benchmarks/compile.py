@@ -0,0 +1,65 @@
+"""
+Timings of compiled chains against fused pipelines. Run with
+
+    python -m benchmarks.compile
+
+The first table runs a where/select/distinct/take chain and a where/select
+sum over a large list. The second builds and runs a small query many times
+with new lambdas each time, which only generates code for the first run.
+Times are per run of the query.
+"""
+import timeit
+from py_linq import Enumerable
+
+
+def chain(data, compiled):
+    enumerable = Enumerable(data) \
+        .where(lambda x: x % 3 != 0) \
+        .select(lambda x: x * 7) \
+        .where(lambda x: x % 2 == 0) \
+        .select(lambda x: x + 1) \
+        .distinct(lambda x: x % 100003) \
+        .take(50000)
+    if compiled:
+        enumerable = enumerable.compile()
+    return enumerable.to_list()
+
+
+def total(data, compiled):
+    enumerable = Enumerable(data) \
+        .where(lambda x: x % 3 != 0) \
+        .where(lambda x: x % 2 == 0)
+    if compiled:
+        enumerable = enumerable.compile()
+    return enumerable.sum(lambda x: x * 7)
+
+
+def small_query(data, limit, compiled):
+    enumerable = Enumerable(data) \
+        .where(lambda x: x > limit) \
+        .select(lambda x: x * 2) \
+        .take(5)
+    if compiled:
+        enumerable = enumerable.compile()
+    return enumerable.to_list()
+
+
+def report(name, func, n):
+    pipeline = min(timeit.repeat(lambda: func(False), number=1, repeat=5))
+    compiled = min(timeit.repeat(lambda: func(True), number=1, repeat=5))
+    print(u"{0:<14}{1:>11.1f}us{2:>11.1f}us{3:>10.2f}x".format(
+        name, pipeline / n * 1e6, compiled / n * 1e6, pipeline / compiled))
+
+
+if __name__ == '__main__':
+    print(u"{0:<14}{1:>13}{2:>13}{3:>11}".format(
+        u'', u'pipeline', u'compiled', u'speedup'))
+    data = list(range(10 ** 6))
+    report(u'chain', lambda compiled: chain(data, compiled), 1)
+    report(u'sum', lambda compiled: total(data, compiled), 1)
+    small = list(range(100))
+    report(
+        u'small x 10000',
+        lambda compiled: [
+            small_query(small, i % 50, compiled) for i in range(10000)],
+        10000)
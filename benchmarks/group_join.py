@@ -0,0 +1,53 @@
+"""
+Compares the hash based group_join with the previous cartesian product
+implementation. Run with
+
+    python -m benchmarks.group_join
+"""
+import itertools
+import timeit
+from py_linq import Enumerable
+
+
+def product_group_join(outer, inner, outer_key, inner_key):
+    """
+    The previous implementation: group an n * m cartesian product by outer key
+    and filter every group by inner key
+    """
+    return Enumerable(
+        itertools.product(outer, inner.default_if_empty())
+    ).group_by(
+        key_names=['id'],
+        key=lambda x: outer_key(x[0]),
+        result_func=lambda g: (
+            g.first()[0],
+            g.where(lambda x: inner_key(x[1]) == g.key.id).select(
+                lambda x: x[1]
+            )
+        )
+    )
+
+
+def run(n, compare):
+    outer = Enumerable(list(range(n)))
+    inner = Enumerable([i % n for i in range(n)])
+    hashed = min(timeit.repeat(
+        lambda: outer.group_join(inner).select(lambda r: r[1].count()).sum(),
+        number=1, repeat=3))
+    line = u"{0:>7} x {0:<7}hash {1:>9.4f}s".format(n, hashed)
+    if compare:
+        product = min(timeit.repeat(
+            lambda: product_group_join(
+                outer, inner, lambda x: x, lambda x: x
+            ).select(lambda r: r[1].count()).sum(),
+            number=1, repeat=1))
+        line += u"    product {0:>9.4f}s    {1:>8.1f}x".format(
+            product, product / hashed)
+    print(line)
+
+
+if __name__ == '__main__':
+    for n in [100, 300, 1000]:
+        run(n, True)
+    for n in [10 ** 4, 10 ** 5]:
+        run(n, False)
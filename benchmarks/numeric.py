@@ -0,0 +1,43 @@
+"""
+Timings of aggregations, comparisons and projections over 10^7 random
+floats, stored in a list for Enumerable and in a NumPy array for
+Enumerable.from_array. Run with
+
+    python -m benchmarks.numeric
+
+Requires NumPy. The queries use lambdas that NumericEnumerable can call
+with the whole array, so every query runs vectorized.
+"""
+import timeit
+import numpy
+from py_linq import Enumerable
+
+
+queries = [
+    (u'sum', lambda e: e.sum()),
+    (u'avg', lambda e: e.avg()),
+    (u'min', lambda e: e.min()),
+    (u'max', lambda e: e.max()),
+    (u'median', lambda e: e.median()),
+    (u'sum(x * x)', lambda e: e.sum(lambda x: x * x)),
+    (u'where/count', lambda e: e.where(lambda x: x > 0.5).count()),
+    (u'where/select/max', lambda e: e.where(lambda x: x < 0.25)
+        .select(lambda x: x * 4 - 1).max()),
+]
+
+
+def measure(func, enumerable):
+    return min(timeit.repeat(lambda: func(enumerable), number=1, repeat=3))
+
+
+if __name__ == '__main__':
+    array = numpy.random.default_rng(0).random(10 ** 7)
+    generic = Enumerable(array.tolist())
+    numeric = Enumerable.from_array(array)
+    print(u"{0:<18}{1:>10}{2:>10}{3:>10}".format(
+        u'query', u'list', u'array', u'speedup'))
+    for name, func in queries:
+        sequential = measure(func, generic)
+        vectorized = measure(func, numeric)
+        print(u"{0:<18}{1:>9.3f}s{2:>9.4f}s{3:>9.0f}x".format(
+            name, sequential, vectorized, sequential / vectorized))
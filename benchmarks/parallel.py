@@ -0,0 +1,55 @@
+"""
+Timings of a CPU bound select followed by a sum, and of a group_by with a
+CPU bound key, run sequentially and with as_parallel for growing numbers of
+worker processes. The parallel runs reduce each chunk in its worker and only
+merge the partial sums and hash tables in the calling process. Run with
+
+    python -m benchmarks.parallel
+
+Speedups depend on the number of cores of the machine. Each run creates its
+own process pool, so start up costs are included.
+"""
+import os
+import timeit
+from py_linq import Enumerable
+
+
+def work(x):
+    total = 0
+    for i in range(200):
+        total += (x * i) % 7
+    return total
+
+
+def enumerable(data, workers):
+    if workers == 0:
+        return Enumerable(data)
+    return Enumerable(data).as_parallel(workers=workers, chunk_size=2048)
+
+
+def select_sum(data, workers):
+    return enumerable(data, workers).select(work).sum()
+
+
+def group_count(data, workers):
+    return enumerable(data, workers).group_by(key=work) \
+        .select(lambda g: g.count()).to_list()
+
+
+def report(name, func, data):
+    sequential = min(timeit.repeat(lambda: func(data, 0), number=1, repeat=3))
+    print(u"{0:<14}{1:<12}{2:>10.3f}s".format(name, u'sequential', sequential))
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        seconds = min(timeit.repeat(
+            lambda: func(data, workers), number=1, repeat=3))
+        print(u"{0:<14}{1:<12}{2:>10.3f}s{3:>8.2f}x".format(
+            name, u'{0} workers'.format(workers), seconds,
+            sequential / seconds))
+        workers *= 2
+
+
+if __name__ == '__main__':
+    data = list(range(200000))
+    report(u'select/sum', select_sum, data)
+    report(u'group_by', group_count, data)
@@ -0,0 +1,54 @@
+"""
+Timings of select/where chains of growing length against the same chain of
+builtin map and filter iterators. Run with
+
+    python -m benchmarks.pipeline
+
+The overhead column is the time per element of the Enumerable chain minus the
+time per element of the builtin chain. It should stay roughly flat as the
+chain grows, as the stream operators are fused into a single iterator instead
+of one cached Enumerable per operator.
+"""
+import timeit
+from py_linq import Enumerable
+
+
+def identity(x):
+    return x
+
+
+def truthy(x):
+    return True
+
+
+def enumerable_chain(data, length):
+    enumerable = Enumerable(data)
+    for i in range(length):
+        enumerable = enumerable.select(identity) if i % 2 == 0 \
+            else enumerable.where(truthy)
+    return enumerable.sum()
+
+
+def builtin_chain(data, length):
+    iterator = iter(data)
+    for i in range(length):
+        iterator = map(identity, iterator) if i % 2 == 0 \
+            else filter(truthy, iterator)
+    return sum(iterator)
+
+
+def run(n, length):
+    data = list(range(n))
+    enumerable = min(timeit.repeat(
+        lambda: enumerable_chain(data, length), number=1, repeat=5))
+    builtin = min(timeit.repeat(
+        lambda: builtin_chain(data, length), number=1, repeat=5))
+    print(u"{0:>7}{1:>12.4f}s{2:>12.4f}s{3:>12.1f}ns/element".format(
+        length, enumerable, builtin, (enumerable - builtin) / n * 1e9))
+
+
+if __name__ == '__main__':
+    print(u"{0:>7}{1:>13}{2:>13}{3:>22}".format(
+        u'stages', u'enumerable', u'builtin', u'overhead'))
+    for length in [1, 2, 4, 6, 8, 12, 16]:
+        run(200000, length)
@@ -0,0 +1,29 @@
+"""
+Timings of the set operators for growing sequence lengths. Run with
+
+    python -m benchmarks.set_operators
+
+Time per element should stay roughly flat as the length grows.
+"""
+import timeit
+from py_linq import Enumerable
+
+
+def run(n):
+    first = list(range(n))
+    second = list(range(n // 2, n + n // 2))
+    operators = [
+        ('except_', lambda: Enumerable(first).except_(Enumerable(second)).count()),
+        ('intersect', lambda: Enumerable(first).intersect(Enumerable(second)).count()),
+        ('union', lambda: Enumerable(first).union(Enumerable(second)).count()),
+        ('symmetric_except', lambda: Enumerable(first).symmetric_except(Enumerable(second)).count()),
+    ]
+    for name, func in operators:
+        seconds = min(timeit.repeat(func, number=1, repeat=3))
+        print(u"{0:<18}{1:>9}{2:>12.4f}s{3:>12.1f}ns/element".format(
+            name, n, seconds, seconds / n * 1e9))
+
+
+if __name__ == '__main__':
+    for n in [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]:
+        run(n)
@@ -6,3 +6,9 @@ try:
     from py_linq import Enumerable  # noqa
 except ImportError:
     from py_linq.py_linq3 import Enumerable3 as Enumerable  # noqa
+
+try:
+    # async generators need Python 3.6 or later
+    from py_linq.async_enumerable import AsyncEnumerable3 as AsyncEnumerable  # noqa
+except (ImportError, SyntaxError):
+    pass
@@ -0,0 +1,543 @@
+import asyncio
+import collections
+import inspect
+from .core import KeySet, KeyTable
+from .exceptions import NoElementsError, NullArgumentError
+from .py_linq3 import Enumerable3, Grouping3, _key_object
+
+
+_missing = object()
+
+
+async def _call(func, *args):
+    """
+    Calls func and awaits the result if it is awaitable, so that both plain
+    functions and coroutine functions can be used as selectors
+    """
+    result = func(*args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def _from_iterable(iterable):
+    for element in iterable:
+        yield element
+
+
+class _Deferred(object):
+    """
+    Async iterable that creates a new async generator every time it is
+    iterated, so derived AsyncEnumerables can be enumerated more than once
+    """
+    def __init__(self, function, *args):
+        self.function = function
+        self.args = args
+
+    def __aiter__(self):
+        return self.function(*self.args).__aiter__()
+
+
+async def _select(source, func):
+    async for element in source:
+        yield await _call(func, element)
+
+
+async def _where(source, predicate):
+    async for element in source:
+        if await _call(predicate, element):
+            yield element
+
+
+async def _select_many(source, func):
+    async for element in source:
+        children = await _call(func, element)
+        if hasattr(children, '__aiter__'):
+            async for child in children:
+                yield child
+        else:
+            for child in children:
+                yield child
+
+
+async def _take(source, n):
+    if n <= 0:
+        return
+    i = 0
+    async for element in source:
+        yield element
+        i += 1
+        if i >= n:
+            return
+
+
+async def _skip(source, n):
+    i = 0
+    async for element in source:
+        if i >= n:
+            yield element
+        i += 1
+
+
+async def _take_while(source, predicate):
+    async for element in source:
+        if not await _call(predicate, element):
+            return
+        yield element
+
+
+async def _skip_while(source, predicate):
+    skipping = True
+    async for element in source:
+        if skipping and await _call(predicate, element):
+            continue
+        skipping = False
+        yield element
+
+
+async def _distinct(source, key):
+    seen = KeySet()
+    async for element in source:
+        if seen.add(await _call(key, element)):
+            yield element
+
+
+async def _concat(first, second):
+    async for element in first:
+        yield element
+    async for element in second:
+        yield element
+
+
+async def _order_by(source, key, descending):
+    elements = []
+    keys = []
+    async for element in source:
+        elements.append(element)
+        keys.append(await _call(key, element))
+    order = sorted(
+        range(len(elements)), key=keys.__getitem__, reverse=descending)
+    for i in order:
+        yield elements[i]
+
+
+async def _group_by(source, key_names, key, result_func, ordered_keys):
+    table = KeyTable()
+    async for element in source:
+        table.add(await _call(key, element), element)
+    items = table.items()
+    if ordered_keys:
+        items = sorted(items, key=lambda item: item[0])
+    for k, elements in items:
+        yield await _call(
+            result_func, Grouping3(_key_object(k, key_names), elements))
+
+
+async def _select_async(source, func, concurrency, ordered, return_exceptions):
+    """
+    Yields the results of func over source with at most concurrency calls
+    running at a time. The source is only read when a call slot is free
+    """
+    iterator = source.__aiter__()
+    pending = collections.deque()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    element = await iterator.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.append(asyncio.ensure_future(_call(func, element)))
+            if not pending:
+                return
+            if ordered:
+                done = [pending.popleft()]
+                await asyncio.wait(done)
+            else:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.remove(task)
+            for task in done:
+                if return_exceptions and not task.cancelled() \
+                        and task.exception() is not None:
+                    yield task.exception()
+                else:
+                    yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class AsyncEnumerable3(object):
+    def __init__(self, data=[]):
+        """
+        Constructor of an Enumerable over an async iterable for asyncio
+        pipelines. Sync iterables are accepted as well. Operators are lazy and
+        return new AsyncEnumerables, terminal operators are coroutines.
+        Selectors, predicates and keys may be plain functions or coroutine
+        functions. Elements are not cached: every enumeration reads data
+        again, so async generators can only be enumerated once
+        :param data: async iterable or iterable object
+        :return: void
+        """
+        if not hasattr(data, "__aiter__") and not hasattr(data, "__iter__"):
+            raise TypeError(
+                u"AsyncEnumerable must be instantiated with an iterable object")
+        self._data = data
+
+    @property
+    def data(self):
+        """
+        The iterable of the AsyncEnumerable instance
+        :return: async iterable or iterable
+        """
+        return self._data
+
+    def __aiter__(self):
+        if hasattr(self._data, "__aiter__"):
+            return self._data.__aiter__()
+        return _from_iterable(self._data).__aiter__()
+
+    def __repr__(self):
+        return u"AsyncEnumerable({0!r})".format(self._data)
+
+    def _derive(self, function, *args):
+        return AsyncEnumerable3(_Deferred(function, self, *args))
+
+    def select(self, func=lambda x: x):
+        """
+        Transforms data into different form
+        :param func: function or coroutine function to transform elements
+        :return: new AsyncEnumerable object
+        """
+        return self._derive(_select, func)
+
+    def select_async(
+            self, func, concurrency=8, ordered=True, return_exceptions=False):
+        """
+        Transforms data with a coroutine function, running up to concurrency
+        calls at a time. The source is only read while fewer calls are
+        running, which gives backpressure on fast sources
+        :param func: function or coroutine function to transform elements
+        :param concurrency: maximum number of calls running at a time
+        :param ordered: True to yield results in the order of the elements,
+        False to yield them as soon as they are done
+        :param return_exceptions: True to yield the exception raised by func
+        for an element in place of its result instead of raising it
+        :return: new AsyncEnumerable object
+        """
+        if func is None:
+            raise NullArgumentError(u"No selector given for select_async")
+        if concurrency < 1:
+            raise ValueError(u"concurrency must be at least 1")
+        return self._derive(
+            _select_async, func, concurrency, ordered, return_exceptions)
+
+    def where(self, predicate):
+        """
+        Returns new AsyncEnumerable where elements matching predicate are
+        selected
+        :param predicate: function or coroutine function
+        :return: new AsyncEnumerable object
+        """
+        if predicate is None:
+            raise NullArgumentError(u"No predicate given for where clause")
+        return self._derive(_where, predicate)
+
+    def select_many(self, func=lambda x: x):
+        """
+        Flattens an iterable of iterables or async iterables
+        :param func: function or coroutine function returning an iterable
+        :return: new AsyncEnumerable object
+        """
+        return self._derive(_select_many, func)
+
+    def take(self, n):
+        """
+        Returns new AsyncEnumerable of the first n elements
+        :param n: number of elements to take
+        :return: new AsyncEnumerable object
+        """
+        return self._derive(_take, n)
+
+    def skip(self, n):
+        """
+        Returns new AsyncEnumerable where n elements have been skipped
+        :param n: number of elements to skip
+        :return: new AsyncEnumerable object
+        """
+        return self._derive(_skip, n)
+
+    def take_while(self, predicate):
+        """
+        Includes elements while the predicate is True
+        :param predicate: function or coroutine function
+        :return: new AsyncEnumerable object
+        """
+        return self._derive(_take_while, predicate)
+
+    def skip_while(self, predicate):
+        """
+        Bypasses elements while the predicate is True
+        :param predicate: function or coroutine function
+        :return: new AsyncEnumerable object
+        """
+        return self._derive(_skip_while, predicate)
+
+    def distinct(self, key=lambda x: x):
+        """
+        Returns new AsyncEnumerable of the first element of every key
+        :param key: function or coroutine function selecting the key
+        :return: new AsyncEnumerable object
+        """
+        return self._derive(_distinct, key)
+
+    def concat(self, enumerable):
+        """
+        Adds the elements of an async or sync iterable to the end
+        :param enumerable: AsyncEnumerable, async iterable or iterable
+        :return: new AsyncEnumerable object
+        """
+        if not isinstance(enumerable, AsyncEnumerable3):
+            enumerable = AsyncEnumerable3(enumerable)
+        return self._derive(_concat, enumerable)
+
+    def order_by(self, key):
+        """
+        Returns new AsyncEnumerable sorted in ascending order by given key.
+        Every element is read before the first one is yielded
+        :param key: function or coroutine function selecting the key
+        :return: new AsyncEnumerable object
+        """
+        if key is None:
+            raise NullArgumentError(u"No key for sorting given")
+        return self._derive(_order_by, key, False)
+
+    def order_by_descending(self, key):
+        """
+        Returns new AsyncEnumerable sorted in descending order by given key.
+        Every element is read before the first one is yielded
+        :param key: function or coroutine function selecting the key
+        :return: new AsyncEnumerable object
+        """
+        if key is None:
+            raise NullArgumentError(u"No key for sorting given")
+        return self._derive(_order_by, key, True)
+
+    def group_by(
+            self,
+            key_names=[],
+            key=lambda x: x,
+            result_func=lambda x: x,
+            ordered_keys=False
+    ):
+        """
+        Groups elements on given key selector into Grouping objects, in order
+        of first key occurrence. Every element is read before the first group
+        is yielded
+        :param key_names: list of key names
+        :param key: function or coroutine function selecting the key
+        :param result_func: function or coroutine function to transform the
+        groupings
+        :param ordered_keys: True to return groups sorted by key
+        :return: new AsyncEnumerable of grouping objects
+        """
+        return self._derive(
+            _group_by, key_names, key, result_func, ordered_keys)
+
+    async def to_list(self):
+        """
+        Reads every element into a list
+        :return: list object
+        """
+        return [element async for element in self]
+
+    async def to_enumerable(self):
+        """
+        Reads every element into a synchronous Enumerable
+        :return: Enumerable object
+        """
+        return Enumerable3(await self.to_list())
+
+    async def count(self):
+        """
+        Returns the number of elements
+        :return: integer object
+        """
+        count = 0
+        async for _ in self:
+            count += 1
+        return count
+
+    async def sum(self, func=lambda x: x):
+        """
+        Returns the sum of the elements
+        :param func: function or coroutine function to transform elements
+        :return: sum of selected elements
+        """
+        total = 0
+        async for element in self:
+            total = total + await _call(func, element)
+        return total
+
+    async def _extreme(self, func, largest):
+        result = _missing
+        async for element in self:
+            value = await _call(func, element)
+            if result is _missing or (
+                    value > result if largest else value < result):
+                result = value
+        if result is _missing:
+            raise NoElementsError(u"Iterable contains no elements")
+        return result
+
+    async def min(self, func=lambda x: x):
+        """
+        Returns the min value of the elements
+            * Raises NoElementsError if there are no elements
+        :param func: function or coroutine function to transform elements
+        :return: min value
+        """
+        return await self._extreme(func, False)
+
+    async def max(self, func=lambda x: x):
+        """
+        Returns the max value of the elements
+            * Raises NoElementsError if there are no elements
+        :param func: function or coroutine function to transform elements
+        :return: max value
+        """
+        return await self._extreme(func, True)
+
+    async def avg(self, func=lambda x: x):
+        """
+        Returns the average value of the elements
+            * Raises NoElementsError if there are no elements
+        :param func: function or coroutine function to transform elements
+        :return: average value as float object
+        """
+        count = 0
+        total = 0
+        async for element in self:
+            total = total + await _call(func, element)
+            count += 1
+        if count == 0:
+            raise NoElementsError(u"Iterable contains no elements")
+        return float(total) / float(count)
+
+    async def first(self):
+        """
+        Returns the first element. Stops reading after the first element
+            * Raises NoElementsError if there are no elements
+        :return: data element as object
+        """
+        async for element in self:
+            return element
+        raise NoElementsError(u"No element found at index 0")
+
+    async def first_or_default(self):
+        """
+        Returns the first element or None if there are no elements
+        :return: data element as object or None
+        """
+        try:
+            return await self.first()
+        except NoElementsError:
+            return None
+
+    async def last(self):
+        """
+        Returns the last element
+            * Raises NoElementsError if there are no elements
+        :return: data element as object
+        """
+        result = _missing
+        async for element in self:
+            result = element
+        if result is _missing:
+            raise NoElementsError(u"No elements found")
+        return result
+
+    async def element_at(self, n):
+        """
+        Returns element at given index. Stops reading at the index
+            * Raises NoElementsError if no element found at specified position
+        :param n: index as int object
+        :return: Element at given index
+        """
+        if n >= 0:
+            i = 0
+            async for element in self:
+                if i == n:
+                    return element
+                i += 1
+        raise NoElementsError(u"No element found at index {0}".format(n))
+
+    async def any(self, predicate=lambda x: True):
+        """
+        Returns True if any element satisfies predicate. Stops reading at the
+        first element that does
+        :param predicate: function or coroutine function
+        :return: boolean True or False
+        """
+        if predicate is None:
+            raise NullArgumentError(
+                u"predicate lambda expression is necessary")
+        async for element in self:
+            if await _call(predicate, element):
+                return True
+        return False
+
+    async def all(self, predicate):
+        """
+        Returns True if every element satisfies predicate. Stops reading at
+        the first element that does not
+        :param predicate: function or coroutine function
+        :return: boolean True or False
+        """
+        if predicate is None:
+            raise NullArgumentError(
+                u"predicate lambda expression is necessary")
+        async for element in self:
+            if not await _call(predicate, element):
+                return False
+        return True
+
+    async def contains(self, element, key=lambda x: x):
+        """
+        Returns True if an element with the same key is found
+        :param element: the element to look for
+        :param key: function or coroutine function selecting the key
+        :return: boolean True or False
+        """
+        value = await _call(key, element)
+        return await self.any(lambda e: _equals(key, e, value))
+
+    async def aggregate(self, func, seed=None):
+        """
+        Perform a calculation over the elements using the initial seed value
+            * Raises NoElementsError if there are no elements
+        :param func: function or coroutine function of
+        (aggregate result, next element)
+        :param seed: initial seed value for the calculation. If None, then the
+        first element is used as the seed
+        :return: result of the calculation
+        """
+        result = _missing if seed is None else seed
+        found = False
+        async for element in self:
+            found = True
+            if result is _missing:
+                result = element
+            else:
+                result = await _call(func, result, element)
+        if not found:
+            raise NoElementsError("No elements perform aggregation")
+        return result
+
+
+async def _equals(key, element, value):
+    return await _call(key, element) == value
@@ -1,3 +1,9 @@
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
+
 class Key(object):
     def __init__(self, key, **kwargs):
         """
@@ -23,3 +29,183 @@ class OrderingDirection(object):
         """
         self.key = key
         self.descending = reverse
+
+
+class Statistics(object):
+    def __init__(self, count, sum, min=None, max=None, variance=None):
+        """
+        Container for the result of a single pass numeric aggregation
+        :param count: number of elements
+        :param sum: sum of elements
+        :param min: minimum element or None if not computed
+        :param max: maximum element or None if not computed
+        :param variance: population variance or None if not computed
+        :return: void
+        """
+        self.count = count
+        self.sum = sum
+        self.min = min
+        self.max = max
+        self.variance = variance
+
+    @property
+    def mean(self):
+        """
+        The arithmetic mean of the elements
+        :return: float object
+        """
+        return float(self.sum) / float(self.count)
+
+    def __repr__(self):
+        return dict(self.__dict__, mean=self.mean).__repr__()
+
+
+class KeySet(object):
+    def __init__(self, keys=()):
+        """
+        Set of keys. Hashable keys are kept in a set. Unhashable keys (lists,
+        dicts) fall back to an equality scan so that any key selector can be
+        used.
+        :param keys: iterable of initial keys
+        :return: void
+        """
+        self._hashed = set()
+        self._unhashable = []
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key):
+        try:
+            return key in self._hashed
+        except TypeError:
+            return key in self._unhashable
+
+    def __len__(self):
+        return len(self._hashed) + len(self._unhashable)
+
+    def add(self, key):
+        """
+        Adds key to the set
+        :param key: the key to add
+        :return: True if the key was not in the set yet, otherwise False
+        """
+        try:
+            if key in self._hashed:
+                return False
+            self._hashed.add(key)
+        except TypeError:
+            if key in self._unhashable:
+                return False
+            self._unhashable.append(key)
+        return True
+
+
+class KeyTable(object):
+    def __init__(self):
+        """
+        Insertion ordered table mapping keys to buckets of elements. Hashable
+        keys are looked up in a dict. Unhashable keys (lists, dicts) fall back
+        to an equality scan so that any key selector can be used.
+        :return: void
+        """
+        self._keys = []
+        self._buckets = []
+        self._index = {}
+        self._unhashable = []
+
+    def _position(self, key):
+        try:
+            return self._index.get(key)
+        except TypeError:
+            for i in self._unhashable:
+                if self._keys[i] == key:
+                    return i
+            return None
+
+    def __contains__(self, key):
+        return self._position(key) is not None
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get(self, key, default=None):
+        """
+        Returns the bucket for the given key
+        :param key: the key to look up
+        :param default: value returned when the key is not in the table
+        :return: list of elements or default
+        """
+        i = self._position(key)
+        return default if i is None else self._buckets[i]
+
+    def bucket(self, key):
+        """
+        Returns the bucket for the given key, creating an empty one if the key
+        is not in the table yet
+        :param key: the key to look up
+        :return: list of elements
+        """
+        i = self._position(key)
+        if i is None:
+            i = len(self._keys)
+            try:
+                self._index[key] = i
+            except TypeError:
+                self._unhashable.append(i)
+            self._keys.append(key)
+            self._buckets.append([])
+        return self._buckets[i]
+
+    def add(self, key, element):
+        """
+        Appends element to the bucket of the given key
+        :param key: the key of the element
+        :param element: the element to store
+        :return: void
+        """
+        self.bucket(key).append(element)
+
+    def keys(self):
+        return iter(self._keys)
+
+    def items(self):
+        """
+        Iterates over (key, bucket) pairs in key insertion order
+        :return: iterator of tuples
+        """
+        return zip(self._keys, self._buckets)
+
+
+class ReversedView(Sequence):
+    def __init__(self, data):
+        """
+        Read only view of a sequence in reversed order. Creating the view is
+        O(1); elements are read from the underlying sequence on access.
+        :param data: Sequence object
+        :return: void
+        """
+        if not isinstance(data, Sequence):
+            raise TypeError(u"data must be a Sequence")
+        self._data = data
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        length = len(self._data)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError(u"ReversedView index out of range")
+        return self._data[length - 1 - index]
+
+    def __iter__(self):
+        return reversed(self._data)
+
+    def __reversed__(self):
+        return iter(self._data)
+
+    def __repr__(self):
+        return list(self).__repr__()
@@ -12,3 +12,7 @@ class NoMatchingElement(Exception):
 
 class MoreThanOneMatchingElement(Exception):
     pass
+
+
+class DuplicateKeyError(Exception):
+    pass
@@ -0,0 +1,149 @@
+import itertools
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# bool, signed and unsigned integer and float dtypes
+_numeric_kinds = u'biuf'
+
+
+def is_numeric_array(data):
+    """
+    Returns whether data is a one dimensional NumPy array of numbers
+    :param data: any object
+    :return: boolean object
+    """
+    return numpy is not None and isinstance(data, numpy.ndarray) \
+        and data.ndim == 1 and data.dtype.kind in _numeric_kinds
+
+
+def to_array(data, dtype=None):
+    """
+    Converts data into a one dimensional NumPy array of numbers. Arrays are
+    not copied unless dtype requires it
+        * Raises TypeError if data is not one dimensional or not numeric
+    :param data: NumPy array or iterable of numbers
+    :param dtype: NumPy dtype of the array, inferred from data if None
+    :return: numpy.ndarray object
+    """
+    if numpy is None:
+        raise ImportError(u"NumPy is required for NumericEnumerable")
+    if not isinstance(data, numpy.ndarray):
+        data = list(data)
+    array = numpy.asarray(data, dtype=dtype)
+    if array.ndim != 1 or array.dtype.kind not in _numeric_kinds:
+        raise TypeError(
+            u"NumericEnumerable must be instantiated with a one dimensional "
+            u"array of numbers")
+    return array
+
+
+def iterate(array, chunk_size=65536):
+    """
+    Yields the elements of array as Python numbers. The array is converted
+    one chunk at a time, which is faster than iterating NumPy scalars and
+    does not create a list of the whole array
+    :param array: numpy.ndarray object
+    :param chunk_size: number of elements converted at a time
+    :return: generator of int, float or bool objects
+    """
+    return itertools.chain.from_iterable(
+        array[i:i + chunk_size].tolist()
+        for i in range(0, len(array), chunk_size))
+
+
+def _same(expected, actual):
+    if isinstance(expected, numpy.generic):
+        expected = expected.item()
+    if type(expected) is not type(actual):
+        return False
+    return expected == actual or expected != expected and actual != actual
+
+
+def _is_result(result, array):
+    return isinstance(result, numpy.ndarray) \
+        and result.shape == array.shape \
+        and result.dtype.kind in _numeric_kinds
+
+
+def _agrees(result, estimate):
+    """
+    Returns whether an integer or boolean computation agrees with the same
+    computation in float64. Integer arithmetic in NumPy silently wraps
+    around at 64 bits, while the float64 estimate only loses precision, so
+    a wrapped element differs from its estimate by about 2 ** 64
+    """
+    if result.dtype.kind == u'b' or estimate.dtype.kind == u'b':
+        return bool((result == estimate).all())
+    if result.dtype.kind in u'iu' \
+            and numpy.abs(estimate).max() >= float(2 ** 62):
+        return False
+    return bool(numpy.allclose(result, estimate, rtol=1e-9, atol=0))
+
+
+def vectorize(func, array):
+    """
+    Calls func once with the whole array instead of once per element. This
+    works for functions built from arithmetic, comparison and NumPy ufuncs,
+    such as lambda x: x * 2 + 1 or lambda x: x > 0.5. The result is only
+    used if it is a numeric array of the same length whose first and last
+    elements equal func called with the first and last elements as Python
+    numbers. For integer and boolean arrays func is also computed in
+    float64, and the result is only used if both agree, so that results
+    that wrapped around at 64 bits are never returned. Any floating point
+    error makes func fall back to the per element path, so that it raises
+    or returns what plain Python would
+    :param func: function of one number
+    :param array: numpy.ndarray object
+    :return: numpy.ndarray object or None if func cannot be vectorized
+    """
+    if len(array) == 0:
+        return None
+    try:
+        with numpy.errstate(all=u'raise'):
+            result = func(array)
+            if not _is_result(result, array):
+                return None
+            if array.dtype.kind in u'biu':
+                estimate = func(array.astype(numpy.float64))
+                if not _is_result(estimate, array) \
+                        or not _agrees(result, estimate):
+                    return None
+        for i in (0, -1):
+            if not _same(func(array[i].item()), result[i].item()):
+                return None
+    except Exception:
+        return None
+    return result
+
+
+def array_sum(array):
+    """
+    Returns the sum of array as a Python number. Integer arrays whose sum
+    could overflow 64 bits are summed exactly with Python integers
+    :param array: numpy.ndarray object
+    :return: int or float object
+    """
+    if array.dtype.kind in u'iu' and len(array) > 0:
+        largest = max(abs(int(array.min())), abs(int(array.max())))
+        if largest * len(array) >= 2 ** 63:
+            return sum(iterate(array))
+    return array.sum().item()
+
+
+def array_median(array):
+    """
+    Returns the median of a non empty array. Like Enumerable.median, uses a
+    selection algorithm instead of sorting the array
+    :param array: numpy.ndarray object
+    :return: median value
+    """
+    length = len(array)
+    i = length // 2
+    if length % 2 == 1:
+        return numpy.partition(array, i)[i].item()
+    result = numpy.partition(array, [i - 1, i])
+    return (float(result[i - 1]) + float(result[i])) / float(2)
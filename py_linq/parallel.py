@@ -0,0 +1,344 @@
+import collections
+import concurrent.futures
+import copy
+import itertools
+import multiprocessing
+from .core import KeyTable
+from .exceptions import NoElementsError
+
+
+def _cpu_count():
+    """
+    Returns the number of CPUs, or 1 if it cannot be determined. Used instead
+    of os.cpu_count, which needs Python 3.4
+    :return: integer object
+    """
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def _apply_stages(stages, chunk):
+    """
+    Applies select, where and select_many stages to a chunk of elements.
+    Runs in the worker processes, so it has to be a module level function
+    :param stages: tuple of (operator, function) stages
+    :param chunk: list of elements
+    :return: list of resulting elements
+    """
+    for operator, func in stages:
+        if operator == u'select':
+            chunk = [func(element) for element in chunk]
+        elif operator == u'where':
+            chunk = [element for element in chunk if func(element)]
+        elif operator == u'select_many':
+            chunk = [
+                element for parent in chunk for element in func(parent)]
+        else:
+            raise ValueError(u"Unknown operator {0}".format(operator))
+    return chunk
+
+
+def _identity(x):
+    return x
+
+
+def _count_chunk(stages, chunk):
+    return len(_apply_stages(stages, chunk))
+
+
+def _sum_chunk(stages, chunk, func):
+    return sum(map(func, _apply_stages(stages, chunk)))
+
+
+def _extreme_chunk(stages, chunk, func, largest):
+    values = list(map(func, _apply_stages(stages, chunk)))
+    if not values:
+        return 0, None
+    return len(values), max(values) if largest else min(values)
+
+
+def _aggregate_chunk(stages, chunk, func, seed):
+    """
+    Folds a chunk with func. The seed is copied so that mutable seeds are
+    not shared by chunks running in the same process
+    :return: tuple of number of elements and partial result
+    """
+    chunk = _apply_stages(stages, chunk)
+    if not chunk:
+        return 0, None
+    if seed is None:
+        result = chunk[0]
+        elements = itertools.islice(chunk, 1, None)
+    else:
+        result = copy.deepcopy(seed)
+        elements = chunk
+    for element in elements:
+        result = func(result, element)
+    return len(chunk), result
+
+
+def _group_chunk(stages, chunk, key):
+    """
+    Groups a chunk into a hash table
+    :return: list of (key, elements) tuples in order of first key occurrence
+    """
+    table = KeyTable()
+    for element in _apply_stages(stages, chunk):
+        table.add(key(element), element)
+    return list(table.items())
+
+
+def _completed(executor, func, arguments, window, ordered, cancel=True):
+    """
+    Submits func(*args) to executor for every tuple of arguments, with at
+    most window calls in flight, and yields the futures in submission order
+    if ordered or in completion order if not. When the generator is closed,
+    calls that have not started are cancelled, or all calls in flight are
+    waited for if cancel is False. Shutting down a ProcessPoolExecutor
+    after cancelling queued calls can hang on Python 3.7 to 3.9, so process
+    pools have to wait
+    :param executor: concurrent.futures.Executor object
+    :param func: function to call
+    :param arguments: iterable of argument tuples, read lazily
+    :param window: maximum number of calls in flight
+    :param ordered: True to yield futures in submission order
+    :param cancel: True to cancel pending calls, False to wait for them
+    :return: generator of done futures
+    """
+    arguments = iter(arguments)
+    pending = collections.deque()
+    try:
+        for args in itertools.islice(arguments, window):
+            pending.append(executor.submit(func, *args))
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+                concurrent.futures.wait(done)
+            else:
+                done = concurrent.futures.wait(
+                    pending,
+                    return_when=concurrent.futures.FIRST_COMPLETED).done
+                for future in done:
+                    pending.remove(future)
+            for future in done:
+                for args in itertools.islice(arguments, 1):
+                    pending.append(executor.submit(func, *args))
+                yield future
+    finally:
+        if cancel:
+            for future in pending:
+                future.cancel()
+        else:
+            concurrent.futures.wait(pending)
+
+
+def _select_concurrent(
+        iterable, func, max_workers, ordered, prefetch, return_exceptions):
+    """
+    Yields func(element) for every element of iterable, computed on a thread
+    pool with at most prefetch calls in flight
+    """
+    if max_workers is None:
+        max_workers = min(32, _cpu_count() + 4)
+    if prefetch is None:
+        prefetch = 2 * max_workers
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        completed = _completed(
+            executor, func, ((element,) for element in iterable), prefetch,
+            ordered)
+        try:
+            for future in completed:
+                if return_exceptions and future.exception() is not None:
+                    yield future.exception()
+                else:
+                    yield future.result()
+        finally:
+            completed.close()
+
+
+class ParallelQuery(object):
+    def __init__(
+            self,
+            source,
+            stages=(),
+            workers=None,
+            chunk_size=1024,
+            ordered=True,
+            executor=None
+    ):
+        """
+        Stream operators executed in parallel over chunks of a source. The
+        source is read in the calling process and split into lists of
+        chunk_size elements, each of which is processed by a worker. At most
+        two chunks per worker are in flight at any time, so memory stays
+        bounded for long and infinite sources.
+
+        Functions of the stages are sent to the workers of a process pool and
+        must be picklable, e.g. module level functions or functools.partial
+        objects of them, but not lambdas.
+        :param source: iterable object
+        :param stages: tuple of (operator, function) stages
+        :param workers: number of worker processes, defaults to the number of
+        CPUs
+        :param chunk_size: number of elements sent to a worker at a time
+        :param ordered: True to yield results in the order of the source,
+        False to yield the results of each chunk as soon as it is done
+        :param executor: concurrent.futures.Executor to use instead of a new
+        process pool. It is not shut down after use
+        :return: void
+        """
+        if workers is not None and workers < 1:
+            raise ValueError(u"workers must be at least 1")
+        if chunk_size < 1:
+            raise ValueError(u"chunk_size must be at least 1")
+        self.source = source
+        self.stages = tuple(stages)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.ordered = ordered
+        self.executor = executor
+
+    def _replace(self, **changes):
+        arguments = dict(
+            source=self.source,
+            stages=self.stages,
+            workers=self.workers,
+            chunk_size=self.chunk_size,
+            ordered=self.ordered,
+            executor=self.executor,
+        )
+        arguments.update(changes)
+        return ParallelQuery(**arguments)
+
+    def then(self, operator, func):
+        """
+        Returns a new query with one more stage
+        :param operator: 'select', 'where' or 'select_many'
+        :param func: picklable function of the stage
+        :return: new ParallelQuery object
+        """
+        return self._replace(stages=self.stages + ((operator, func),))
+
+    def with_order(self, ordered):
+        """
+        Returns a new query that does or does not preserve the source order
+        :param ordered: True to preserve the order of the source
+        :return: new ParallelQuery object
+        """
+        return self._replace(ordered=ordered)
+
+    def map_chunks(self, func, *args):
+        """
+        Yields func(stages, chunk, *args) for every chunk of the source, in
+        source order if the query is ordered and in completion order if not
+        :param func: picklable module level function
+        :param args: further picklable arguments of func
+        :return: generator of results
+        """
+        executor = self.executor
+        if executor is None:
+            executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+        source = iter(self.source)
+        chunks = iter(lambda: list(
+            itertools.islice(source, self.chunk_size)), [])
+        completed = _completed(
+            executor,
+            func,
+            ((self.stages, chunk) + args for chunk in chunks),
+            2 * (self.workers or _cpu_count()),
+            self.ordered,
+            cancel=False)
+        try:
+            for future in completed:
+                yield future.result()
+        finally:
+            completed.close()
+            if self.executor is None:
+                executor.shutdown(wait=True)
+
+    def __iter__(self):
+        chunks = self.map_chunks(_apply_stages)
+        try:
+            for chunk in chunks:
+                for element in chunk:
+                    yield element
+        finally:
+            # closing an abandoned iterator finishes the chunks in flight and
+            # shuts down the pool right away instead of when it is collected
+            chunks.close()
+
+    def count(self):
+        """
+        Returns the number of resulting elements, counted per chunk
+        :return: integer object
+        """
+        return sum(self.map_chunks(_count_chunk))
+
+    def sum(self, func):
+        """
+        Returns the sum of func over the resulting elements. Partial sums are
+        computed per chunk and added up in the calling process
+        :param func: picklable function to transform elements
+        :return: sum of transformed elements
+        """
+        return sum(self.map_chunks(_sum_chunk, func))
+
+    def extreme(self, func, largest):
+        """
+        Returns the min or max of func over the resulting elements
+            * Raises NoElementsError if there are no resulting elements
+        :param func: picklable function to transform elements
+        :param largest: True for max, False for min
+        :return: min or max value
+        """
+        partials = [
+            value for n, value in self.map_chunks(_extreme_chunk, func, largest)
+            if n > 0]
+        if not partials:
+            raise NoElementsError(u"Iterable contains no elements")
+        return max(partials) if largest else min(partials)
+
+    def aggregate(self, func, seed, combine):
+        """
+        Folds every chunk with func starting from a copy of seed, or from the
+        first element of the chunk when seed is None, and merges the partial
+        results with combine in chunk order, or in completion order when the
+        query is unordered. combine must be associative, and seed must be an
+        identity of combine, for the result to equal a sequential fold
+            * Raises NoElementsError if there are no resulting elements
+        :param func: picklable function of (partial result, element)
+        :param seed: picklable initial value of every partial result or None
+        :param combine: function of (result, partial result)
+        :return: combined result
+        """
+        result = None
+        found = False
+        for n, partial in self.map_chunks(_aggregate_chunk, func, seed):
+            if n == 0:
+                continue
+            result = combine(result, partial) if found else partial
+            found = True
+        if not found:
+            raise NoElementsError("No elements perform aggregation")
+        return result
+
+    def group(self, key):
+        """
+        Groups the resulting elements into one hash table per chunk and
+        merges the tables in chunk order, so keys are in order of first
+        occurrence and elements keep their order within each group when the
+        query is ordered
+        :param key: picklable key selector
+        :return: KeyTable object
+        """
+        table = KeyTable()
+        for items in self.map_chunks(_group_chunk, key):
+            for k, elements in items:
+                table.bucket(k).extend(elements)
+        return table
+
+    def __repr__(self):
+        return u"ParallelQuery({0})".format(
+            u" -> ".join(operator for operator, _ in self.stages))
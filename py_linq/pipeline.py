@@ -0,0 +1,250 @@
+import functools
+import itertools
+from .core import KeySet
+
+
+class Pipeline(object):
+    def __init__(self, source, stages=()):
+        """
+        Lazy record of stream operators applied to a source. Operators are
+        only executed when the pipeline is iterated, at which point the whole
+        chain is fused into a single iterator over the source instead of one
+        Enumerable per operator.
+
+        Each stage is an (operator, argument) tuple where operator is one of
+        'select', 'where', 'select_many', 'skip', 'take', 'skip_while',
+        'take_while' or 'distinct'.
+        :param source: iterable object
+        :param stages: tuple of stages in order of application
+        :return: void
+        """
+        self.source = source
+        self.stages = tuple(stages)
+
+    def then(self, operator, argument):
+        """
+        Returns a new pipeline over the same source with one more stage
+        :param operator: name of the operator
+        :param argument: function or count of the operator
+        :return: new Pipeline object
+        """
+        return Pipeline(self.source, self.stages + ((operator, argument),))
+
+    def __iter__(self):
+        iterator = iter(self.source)
+        for operator, argument in fuse(self.stages):
+            if operator == u'select':
+                iterator = map(argument, iterator)
+            elif operator == u'where':
+                iterator = filter(argument, iterator)
+            elif operator == u'select_many':
+                iterator = itertools.chain.from_iterable(map(argument, iterator))
+            elif operator == u'slice':
+                iterator = itertools.islice(iterator, argument[0], argument[1])
+            elif operator == u'skip_while':
+                iterator = itertools.dropwhile(argument, iterator)
+            elif operator == u'take_while':
+                iterator = itertools.takewhile(argument, iterator)
+            elif operator == u'distinct':
+                iterator = _distinct(iterator, argument)
+            else:
+                raise ValueError(u"Unknown operator {0}".format(operator))
+        return iterator
+
+    def __repr__(self):
+        return u"{0}({1})".format(
+            type(self).__name__,
+            u" -> ".join(operator for operator, _ in self.stages))
+
+
+class CompiledPipeline(Pipeline):
+    """
+    Pipeline executed as generated Python code: the stages become the body of
+    a single for loop over the source, with predicates and selectors called
+    through local variables and slices kept as integer counters. The code is
+    generated once per pipeline shape, i.e. the sequence of operators, and
+    cached, so compiling the same query over and over only binds new
+    arguments to an existing function.
+
+    select_many is not compiled: the stages up to the last select_many run
+    as a regular Pipeline that feeds the compiled loop.
+    """
+    def then(self, operator, argument):
+        """
+        Returns a new compiled pipeline over the same source with one more stage
+        :param operator: name of the operator
+        :param argument: function or count of the operator
+        :return: new CompiledPipeline object
+        """
+        return CompiledPipeline(
+            self.source, self.stages + ((operator, argument),))
+
+    def _prepare(self):
+        """
+        Returns the source, shape and arguments of the compiled loop
+        """
+        source = self.source
+        stages = self.stages
+        split = 0
+        for i, (operator, _) in enumerate(stages):
+            if operator == u'select_many':
+                split = i + 1
+        if split > 0:
+            source = Pipeline(source, stages[:split])
+            stages = stages[split:]
+        if len(stages) > _max_compiled_stages:
+            source = CompiledPipeline(source, stages[:-_max_compiled_stages])
+            stages = stages[-_max_compiled_stages:]
+        shape = []
+        arguments = []
+        for operator, argument in fuse(stages):
+            if operator != u'slice':
+                shape.append((operator, False))
+                arguments.append(argument)
+            elif argument[1] is None:
+                shape.append((operator, True))
+                arguments.append(argument[0])
+            else:
+                shape.append((operator, False))
+                arguments.extend(argument)
+        return source, tuple(shape), arguments
+
+    @property
+    def code(self):
+        """
+        The generated source code of the compiled loop
+        :return: str object
+        """
+        return _generate(self._prepare()[1], u'iter')[0]
+
+    def __iter__(self):
+        source, shape, arguments = self._prepare()
+        return _generate(shape, u'iter')[1](source, *arguments)
+
+    def sum(self):
+        """
+        Returns the sum of the elements of the pipeline, accumulated inside the
+        compiled loop instead of through an iterator
+        :return: sum of the elements
+        """
+        source, shape, arguments = self._prepare()
+        return _generate(shape, u'sum')[1](source, *arguments)
+
+
+_max_compiled_stages = 64
+
+
+@functools.lru_cache(maxsize=256)
+def _generate(shape, mode):
+    """
+    Generates the function executing a pipeline shape. The function takes the
+    source followed by the arguments of the stages and is a generator of the
+    elements when mode is 'iter' or returns their sum when mode is 'sum'
+    :param shape: tuple of (operator, open ended slice) tuples
+    :param mode: 'iter' or 'sum'
+    :return: tuple of generated source code and function
+    """
+    parameters = [u'source']
+    setup = []
+    body = []
+    checks = []
+    depth = 2
+    empty = u'return' if mode == u'iter' else u'return 0'
+    for i, (operator, open_ended) in enumerate(shape):
+        pad = u'    ' * depth
+        if operator == u'slice':
+            parameters.append(u'start{0}'.format(i))
+            setup.append(u'n{0} = 0'.format(i))
+            if not open_ended:
+                parameters.append(u'stop{0}'.format(i))
+                setup.append(u'if stop{0} <= start{0}:'.format(i))
+                setup.append(u'    ' + empty)
+                checks.append(u'if n{0} >= stop{0}:'.format(i))
+                checks.append(u'    break')
+            body.append(pad + u'n{0} += 1'.format(i))
+            body.append(pad + u'if n{0} > start{0}:'.format(i))
+            depth += 1
+            continue
+        parameters.append(u'f{0}'.format(i))
+        if operator == u'select':
+            body.append(pad + u'x = f{0}(x)'.format(i))
+        elif operator == u'where':
+            body.append(pad + u'if f{0}(x):'.format(i))
+            depth += 1
+        elif operator == u'distinct':
+            setup.append(u'add{0} = KeySet().add'.format(i))
+            body.append(pad + u'if add{0}(f{0}(x)):'.format(i))
+            depth += 1
+        elif operator == u'skip_while':
+            setup.append(u'dropping{0} = True'.format(i))
+            body.append(pad + u'if not dropping{0} or not f{0}(x):'.format(i))
+            body.append(pad + u'    dropping{0} = False'.format(i))
+            depth += 1
+        elif operator == u'take_while':
+            body.append(pad + u'if not f{0}(x):'.format(i))
+            body.append(pad + u'    break')
+        else:
+            raise ValueError(u"Cannot compile operator {0}".format(operator))
+    if mode == u'iter':
+        body.append(u'    ' * depth + u'yield x')
+    else:
+        setup.append(u'total = 0')
+        body.append(u'    ' * depth + u'total = total + x')
+    lines = [u'def query({0}):'.format(u', '.join(parameters))]
+    lines.extend(u'    ' + line for line in setup)
+    lines.append(u'    for x in source:')
+    lines.extend(body)
+    lines.extend(u'        ' + line for line in checks)
+    if mode == u'sum':
+        lines.append(u'    return total')
+    code = u'\n'.join(lines) + u'\n'
+    namespace = {u'KeySet': KeySet}
+    exec(compile(code, u'<pipeline {0}>'.format(mode), u'exec'), namespace)
+    return code, namespace[u'query']
+
+
+def fuse(stages):
+    """
+    Normalizes a chain of stages for execution. skip and take become slices
+    and runs of adjacent slices are merged into one, so that
+    skip(a).take(b).skip(c) costs a single islice. Negative counts are
+    treated as 0.
+
+    Adjacent selects and wheres are kept as separate C level map and filter
+    iterators: composing them into one Python function would add a function
+    call per element instead of removing one.
+    :param stages: tuple of (operator, argument) stages
+    :return: list of (operator, argument) stages
+    """
+    result = []
+    for operator, argument in stages:
+        if operator == u'skip':
+            operator, argument = u'slice', (max(0, argument), None)
+        elif operator == u'take':
+            operator, argument = u'slice', (0, max(0, argument))
+        if operator == u'slice' and result and result[-1][0] == u'slice':
+            argument = _merge_slices(result.pop()[1], argument)
+        result.append((operator, argument))
+    return result
+
+
+def _merge_slices(first, second):
+    """
+    Merges islice(islice(it, *first), *second) into a single (start, stop)
+    """
+    start = first[0] + second[0]
+    stop = None if second[1] is None else first[0] + second[1]
+    if first[1] is not None:
+        stop = first[1] if stop is None else min(stop, first[1])
+        start = min(start, first[1])
+    return start, stop
+
+
+def _distinct(iterable, key):
+    """
+    Yields the first element seen for every key
+    """
+    seen = KeySet()
+    for element in iterable:
+        if seen.add(key(element)):
+            yield element
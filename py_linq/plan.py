@@ -0,0 +1,376 @@
+import operator as _operator
+
+
+class Node(object):
+    """
+    Node of a logical query plan. A plan is a tree of nodes whose leaves are
+    Source nodes over Enumerable objects. Plans are immutable: rewrites
+    return new nodes and share the unchanged subtrees.
+    """
+    children = ()
+
+    def with_children(self, children):
+        """
+        Returns a copy of the node over new children
+        :param children: tuple of Node objects
+        :return: new Node object
+        """
+        raise NotImplementedError()
+
+    def label(self):
+        """
+        Returns the description of the node used by explain
+        :return: str object
+        """
+        raise NotImplementedError()
+
+    def execute(self):
+        """
+        Executes the plan. Stream plans return an Enumerable, scalar plans
+        return their value
+        """
+        raise NotImplementedError()
+
+    def explain(self):
+        """
+        Returns the operator tree of the plan, one operator per line with
+        the operators it reads from indented below it
+        :return: str object
+        """
+        lines = []
+        self._explain(lines, 0)
+        return u"\n".join(lines)
+
+    def _explain(self, lines, depth):
+        lines.append(u"  " * depth + self.label())
+        for child in self.children:
+            child._explain(lines, depth + 1)
+
+    def optimize(self, rules=None):
+        """
+        Rewrites the plan with the optimizer rules until none of them applies
+        :param rules: list of rule functions, defaults to all built-in rules.
+        A rule takes a node and returns the rewritten node or None
+        :return: new Node object
+        """
+        if rules is None:
+            rules = default_rules
+        node = self
+        while True:
+            rewritten = node._rewrite(rules)
+            if rewritten is node:
+                return node
+            node = rewritten
+
+    def _rewrite(self, rules):
+        children = tuple(child._rewrite(rules) for child in self.children)
+        node = self
+        if any(a is not b for a, b in zip(children, self.children)):
+            node = self.with_children(children)
+        for rule in rules:
+            rewritten = rule(node)
+            if rewritten is not None:
+                return rewritten
+        return node
+
+    def __repr__(self):
+        return self.explain()
+
+
+class StreamNode(Node):
+    """
+    Plan node that produces a sequence of elements. Terminal operators can
+    be added to it to build a scalar plan
+    """
+    def count(self):
+        """
+        :return: Count node over self
+        """
+        return Count(self)
+
+    def first(self):
+        """
+        :return: First node over self
+        """
+        return First(self)
+
+    def any(self):
+        """
+        :return: Any node over self
+        """
+        return Any(self)
+
+
+class ScalarNode(Node):
+    """
+    Plan node that produces a single value. Comparing it with a constant
+    builds a Compare node
+    """
+    __hash__ = Node.__hash__
+
+    def __gt__(self, value):
+        return Compare(self, u'>', value)
+
+    def __ge__(self, value):
+        return Compare(self, u'>=', value)
+
+    def __lt__(self, value):
+        return Compare(self, u'<', value)
+
+    def __le__(self, value):
+        return Compare(self, u'<=', value)
+
+    def __eq__(self, value):
+        return Compare(self, u'==', value)
+
+    def __ne__(self, value):
+        return Compare(self, u'!=', value)
+
+
+def _name(func):
+    return getattr(func, u'__name__', None) or repr(func)
+
+
+class Source(StreamNode):
+    def __init__(self, enumerable):
+        """
+        Leaf of a plan, reads the elements of an Enumerable
+        :param enumerable: Enumerable object
+        """
+        self.enumerable = enumerable
+
+    def with_children(self, children):
+        return self
+
+    def label(self):
+        data = self.enumerable.data
+        if hasattr(data, u'__len__'):
+            return u"Source({0}[{1}])".format(type(data).__name__, len(data))
+        return u"Source({0})".format(type(data).__name__)
+
+    def execute(self):
+        return self.enumerable
+
+
+class Stage(StreamNode):
+    def __init__(self, operator, argument, child):
+        """
+        Stream operator of an Enumerable applied to the output of child
+        :param operator: name of the Enumerable method, e.g. 'where'
+        :param argument: function or count passed to the method
+        :param child: Node object
+        """
+        self.operator = operator
+        self.argument = argument
+        self.children = (child,)
+
+    def with_children(self, children):
+        return Stage(self.operator, self.argument, children[0])
+
+    def label(self):
+        name = u"".join(
+            part.capitalize() for part in self.operator.split(u'_'))
+        argument = self.argument if isinstance(self.argument, int) \
+            else _name(self.argument)
+        return u"{0}({1})".format(name, argument)
+
+    def execute(self):
+        enumerable = self.children[0].execute()
+        return getattr(enumerable, self.operator)(self.argument)
+
+
+class OrderBy(StreamNode):
+    def __init__(self, key_funcs, child):
+        """
+        Stable sort of the output of child
+        :param key_funcs: tuple of OrderingDirection objects, primary key first
+        :param child: Node object
+        """
+        self.key_funcs = tuple(key_funcs)
+        self.children = (child,)
+
+    def with_children(self, children):
+        return OrderBy(self.key_funcs, children[0])
+
+    def label(self):
+        return u"OrderBy({0})".format(u", ".join(
+            u"{0} {1}".format(_name(o.key), u'desc' if o.descending else u'asc')
+            for o in self.key_funcs))
+
+    def execute(self):
+        return self.children[0].execute()._order(self.key_funcs)
+
+
+class Compile(StreamNode):
+    def __init__(self, child):
+        """
+        Executes the stream operators of child as generated code
+        :param child: Node object
+        """
+        self.children = (child,)
+
+    def with_children(self, children):
+        return Compile(children[0])
+
+    def label(self):
+        return u"Compile"
+
+    def execute(self):
+        return self.children[0].execute().compile()
+
+
+class Count(ScalarNode):
+    def __init__(self, child):
+        self.children = (child,)
+
+    def with_children(self, children):
+        return Count(children[0])
+
+    def label(self):
+        return u"Count"
+
+    def execute(self):
+        return self.children[0].execute().count()
+
+
+class First(ScalarNode):
+    def __init__(self, child):
+        self.children = (child,)
+
+    def with_children(self, children):
+        return First(children[0])
+
+    def label(self):
+        return u"First"
+
+    def execute(self):
+        return self.children[0].execute().first()
+
+
+class Any(ScalarNode):
+    def __init__(self, child):
+        self.children = (child,)
+
+    def with_children(self, children):
+        return Any(children[0])
+
+    def label(self):
+        return u"Any"
+
+    def execute(self):
+        return self.children[0].execute().any(lambda x: True)
+
+
+class MinBy(ScalarNode):
+    def __init__(self, key_funcs, child):
+        """
+        First element of child in the order of key_funcs, found in a single
+        pass with min or max instead of sorting
+        :param key_funcs: tuple of OrderingDirection objects, primary key first
+        :param child: Node object
+        """
+        self.key_funcs = tuple(key_funcs)
+        self.children = (child,)
+
+    def with_children(self, children):
+        return MinBy(self.key_funcs, children[0])
+
+    def label(self):
+        return u"MinBy({0})".format(u", ".join(
+            u"{0} {1}".format(_name(o.key), u'desc' if o.descending else u'asc')
+            for o in self.key_funcs))
+
+    def execute(self):
+        return self.children[0].execute()._min_by(self.key_funcs)
+
+
+_comparisons = {
+    u'>': _operator.gt,
+    u'>=': _operator.ge,
+    u'<': _operator.lt,
+    u'<=': _operator.le,
+    u'==': _operator.eq,
+    u'!=': _operator.ne,
+}
+
+
+class Compare(ScalarNode):
+    def __init__(self, child, comparison, value):
+        """
+        Compares the value of a scalar plan with a constant
+        :param child: ScalarNode object
+        :param comparison: one of '>', '>=', '<', '<=', '==' or '!='
+        :param value: constant to compare with
+        """
+        if comparison not in _comparisons:
+            raise ValueError(u"Unknown comparison {0}".format(comparison))
+        self.comparison = comparison
+        self.value = value
+        self.children = (child,)
+
+    def with_children(self, children):
+        return Compare(children[0], self.comparison, self.value)
+
+    def label(self):
+        return u"Compare({0} {1!r})".format(self.comparison, self.value)
+
+    def execute(self):
+        return _comparisons[self.comparison](
+            self.children[0].execute(), self.value)
+
+
+def push_where_below_order_by(node):
+    """
+    order_by(k).where(p) -> where(p).order_by(k). Sorting is stable, so
+    filtering first keeps the same elements in the same order and sorts fewer
+    of them
+    """
+    if isinstance(node, Stage) and node.operator == u'where' \
+            and isinstance(node.children[0], OrderBy):
+        order_by = node.children[0]
+        return order_by.with_children(
+            (node.with_children(order_by.children),))
+    return None
+
+
+def collapse_takes(node):
+    """
+    take(a).take(b) -> take(min(a, b))
+    """
+    if isinstance(node, Stage) and node.operator == u'take':
+        child = node.children[0]
+        if isinstance(child, Stage) and child.operator == u'take':
+            return Stage(
+                u'take', min(node.argument, child.argument), child.children[0])
+    return None
+
+
+def first_of_order_by_to_min(node):
+    """
+    order_by(k).first() -> min by k in a single pass without sorting. min
+    and max return the first of equal elements, like a stable sort does
+    """
+    if isinstance(node, First) and isinstance(node.children[0], OrderBy):
+        order_by = node.children[0]
+        return MinBy(order_by.key_funcs, order_by.children[0])
+    return None
+
+
+def count_greater_than_zero_to_any(node):
+    """
+    count() > 0, count() >= 1 and count() != 0 -> any(), which stops at the
+    first element instead of counting all of them
+    """
+    if isinstance(node, Compare) and isinstance(node.children[0], Count) \
+            and (node.comparison, node.value) in [
+                (u'>', 0), (u'>=', 1), (u'!=', 0)]:
+        return Any(node.children[0].children[0])
+    return None
+
+
+default_rules = [
+    push_where_below_order_by,
+    collapse_takes,
+    first_of_order_by_to_min,
+    count_greater_than_zero_to_any,
+]
@@ -1,8 +1,397 @@
+import bisect
+import collections
+import collections.abc
+import heapq
 import itertools
-from .core import Key, OrderingDirection
+import math
+from .core import Key, KeySet, KeyTable, OrderingDirection, ReversedView, \
+    Statistics
 from .decorators import deprecated
+from .numeric import array_median, array_sum, is_numeric_array, iterate, \
+    to_array, vectorize
+from .parallel import ParallelQuery, _identity, _select_concurrent
+from .pipeline import CompiledPipeline, Pipeline, _distinct
+from .plan import Compile, OrderBy, Source, Stage
+from .sketches import HyperLogLog, TDigest
 from .exceptions import NoElementsError, NoMatchingElement, NullArgumentError, \
-    MoreThanOneMatchingElement
+    MoreThanOneMatchingElement, DuplicateKeyError
+
+
+_missing = object()
+
+
+_cache_policies = (u'none', u'lazy', u'passthrough')
+
+
+class _Memo(object):
+    """
+    Elements read so far from a source iterator, shared by every iterator of
+    an Enumerable. source is None once it has been exhausted
+    """
+    def __init__(self, source):
+        self.buffer = []
+        self.source = source
+
+
+class _SortedHead(object):
+    """
+    The first n elements of a SortedEnumerable, selected when iterated
+    """
+    def __init__(self, sorted_enumerable, n):
+        self.sorted_enumerable = sorted_enumerable
+        self.n = n
+
+    def __iter__(self):
+        return iter(self.sorted_enumerable._head(self.n))
+
+
+class _Generated(object):
+    """
+    Iterable that calls a generator function for a new generator every time
+    it is iterated, so an uncached Enumerable over it can be enumerated more
+    than once
+    """
+    def __init__(self, function, *args):
+        self.function = function
+        self.args = args
+
+    def __iter__(self):
+        return self.function(*self.args)
+
+
+class _Descending(object):
+    """
+    Wraps a sort key so that it sorts in descending order inside a composite
+    tuple key, which works for any orderable key and not just numbers
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def _sort_key(key_funcs):
+    """
+    Compiles a chain of OrderingDirection instances into a single key
+    function and reverse flag for one stable sort
+    :param key_funcs: sequence of OrderingDirection instances
+    :return: tuple of (key function or None, reverse)
+    """
+    if len(key_funcs) == 0:
+        return None, False
+    if len(key_funcs) == 1:
+        return key_funcs[0].key, key_funcs[0].descending
+    keys = tuple(o.key for o in key_funcs)
+    directions = set(o.descending for o in key_funcs)
+    if len(directions) == 1:
+        return lambda x: tuple(k(x) for k in keys), directions.pop()
+    parts = tuple((o.key, o.descending) for o in key_funcs)
+    return lambda x: tuple(
+        _Descending(k(x)) if descending else k(x) for k, descending in parts
+    ), False
+
+
+def _extreme(choose, iterable, key=None):
+    """
+    Returns the min or max of iterable in a single pass, or _missing if it is
+    empty. Used instead of the default argument of min and max, which needs
+    Python 3.4
+    :param choose: min or max
+    :param iterable: iterable object
+    :param key: key function or None
+    :return: data element or _missing
+    """
+    iterator = iter(iterable)
+    first = next(iterator, _missing)
+    if first is _missing:
+        return _missing
+    iterator = itertools.chain([first], iterator)
+    return choose(iterator) if key is None else choose(iterator, key=key)
+
+
+def _length(data):
+    """
+    Returns the length of data if it is known without iterating it
+    :param data: iterable object
+    :return: integer object or None
+    """
+    try:
+        return len(data)
+    except TypeError:
+        return None
+
+
+def _hash_join_build_inner(outer, inner, outer_key, inner_key):
+    """
+    Hash join that hashes the inner sequence once and streams the outer
+    sequence against it
+    """
+    table = KeyTable()
+    for i in inner:
+        table.add(inner_key(i), i)
+    if len(table) == 0:
+        return
+    for o in outer:
+        for i in table.get(outer_key(o), ()):
+            yield (o, i)
+
+
+def _hash_join_build_outer(outer, inner, outer_key, inner_key):
+    """
+    Hash join that hashes the outer sequence once and streams the inner
+    sequence against it. Inner matches are collected per outer key so that
+    results are yielded in the same order as _hash_join_build_inner
+    """
+    table = KeyTable()
+    rows = [(o, table.bucket(outer_key(o))) for o in outer]
+    if len(rows) == 0:
+        return
+    for i in inner:
+        matches = table.get(inner_key(i))
+        if matches is not None:
+            matches.append(i)
+    for o, matches in rows:
+        for i in matches:
+            yield (o, i)
+
+
+def _take_last(enumerable, n):
+    """
+    Yields the last n elements. Sequences are indexed by position, since
+    not every Sequence supports slicing, other sources are streamed through
+    a deque holding at most n elements
+    """
+    if n <= 0:
+        return
+    sequence = enumerable._sequence()
+    if sequence is not None:
+        length = len(sequence)
+        for i in range(max(0, length - n), length):
+            yield sequence[i]
+        return
+    for element in collections.deque(enumerable, maxlen=n):
+        yield element
+
+
+def _skip_last(enumerable, n):
+    """
+    Yields all but the last n elements. Sequences are read up to their known
+    length, other sources are streamed through a deque holding at most n
+    elements
+    """
+    sequence = enumerable._sequence()
+    if sequence is not None:
+        for element in itertools.islice(sequence, max(0, len(sequence) - n)):
+            yield element
+        return
+    if n <= 0:
+        for element in enumerable:
+            yield element
+        return
+    buffer = collections.deque()
+    for element in enumerable:
+        buffer.append(element)
+        if len(buffer) > n:
+            yield buffer.popleft()
+
+
+def _reverse(enumerable):
+    """
+    Yields the elements in reversed order. Sequences are read backwards,
+    other sources are buffered in a single pass
+    """
+    sequence = enumerable._sequence()
+    if sequence is None:
+        sequence = list(enumerable)
+    for element in reversed(sequence):
+        yield element
+
+
+def _default_if_empty(enumerable, value):
+    """
+    Yields the elements, or value if there are none, in a single pass
+    """
+    empty = True
+    for element in enumerable:
+        empty = False
+        yield element
+    if empty:
+        yield value
+
+
+def _group_join(outer, inner, outer_key, inner_key):
+    """
+    Hashes the inner sequence into key -> matches once and yields every
+    outer element with an Enumerable of its matches in outer order
+    """
+    table = KeyTable()
+    for i in inner:
+        table.add(inner_key(i), i)
+    for o in outer:
+        yield (o, Enumerable3(table.get(outer_key(o), [])))
+
+
+def _fold_statistics(values, extremes=True, variance=False):
+    """
+    Computes count, sum and optionally min/max and variance of values in a
+    single pass. Variance is accumulated with Welford's algorithm.
+    Raises NoElementsError if values is empty
+    """
+    iterator = iter(values)
+    try:
+        first = next(iterator)
+    except StopIteration:
+        raise NoElementsError(u"Iterable contains no elements")
+    count = 1
+    total = first
+    minimum = maximum = first
+    mean = float(first)
+    m2 = 0.0
+    for value in iterator:
+        count += 1
+        total += value
+        if extremes:
+            if value < minimum:
+                minimum = value
+            elif value > maximum:
+                maximum = value
+        if variance:
+            delta = value - mean
+            mean += delta / count
+            m2 += delta * (value - mean)
+    return Statistics(
+        count,
+        total,
+        minimum if extremes else None,
+        maximum if extremes else None,
+        m2 / count if variance else None
+    )
+
+
+def _multiselect(values, ranks, offset, depth, result):
+    """
+    Finds the order statistics at the given sorted ranks with a quickselect
+    that partitions once for all ranks and recurses only into partitions that
+    still contain a rank. Falls back to sorting when the recursion depth
+    budget is used up, which bounds the worst case to O(n log n)
+    :param values: list of values holding global ranks offset..offset+len-1
+    :param ranks: sorted list of global ranks to find
+    :param offset: global rank of the smallest value in values
+    :param depth: remaining partitioning depth before falling back to sorting
+    :param result: dict receiving rank -> value
+    """
+    if len(values) <= 16 or depth <= 0:
+        ordered = sorted(values)
+        for r in ranks:
+            result[r] = ordered[r - offset]
+        return
+    a, b, c = values[0], values[len(values) // 2], values[-1]
+    if a < b:
+        pivot = b if b < c else (c if a < c else a)
+    else:
+        pivot = a if a < c else (c if b < c else b)
+    lower = [v for v in values if v < pivot]
+    upper = [v for v in values if pivot < v]
+    equal_start = offset + len(lower)
+    upper_start = offset + len(values) - len(upper)
+    lower_ranks = [r for r in ranks if r < equal_start]
+    upper_ranks = [r for r in ranks if r >= upper_start]
+    for r in ranks:
+        if equal_start <= r < upper_start:
+            result[r] = pivot
+    if lower_ranks:
+        _multiselect(lower, lower_ranks, offset, depth - 1, result)
+    if upper_ranks:
+        _multiselect(upper, upper_ranks, upper_start, depth - 1, result)
+
+
+def _order_statistics(values, ranks):
+    """
+    Returns the values at the given ranks as if values were sorted
+    :param values: list of values
+    :param ranks: iterable of ranks
+    :return: dict of rank -> value
+    """
+    result = {}
+    depth = 2 * int(math.log(len(values), 2)) + 1
+    _multiselect(values, sorted(set(ranks)), 0, depth, result)
+    return result
+
+
+def _quantiles(values, qs):
+    """
+    Computes quantiles with linear interpolation between the closest ranks
+    :param values: list of values
+    :param qs: list of quantiles between 0 and 1
+    :return: list of quantile values in the order of qs
+    """
+    if len(values) == 0:
+        raise NoElementsError(u"Iterable contains no elements")
+    for q in qs:
+        if not 0 <= q <= 1:
+            raise ValueError(u"quantile must be between 0 and 1")
+    positions = [(len(values) - 1) * q for q in qs]
+    ranks = []
+    for h in positions:
+        ranks.append(int(math.floor(h)))
+        ranks.append(int(math.ceil(h)))
+    statistics = _order_statistics(values, ranks)
+    result = []
+    for h in positions:
+        lo, hi = int(math.floor(h)), int(math.ceil(h))
+        if lo == hi:
+            result.append(statistics[lo])
+        else:
+            low = statistics[lo]
+            result.append(low + (h - lo) * (statistics[hi] - low))
+    return result
+
+
+def _key_object(k, key_names):
+    """
+    Builds the Key of a grouping. Index of key name corresponds to index of
+    the key if the key is a list or tuple
+    """
+    can_enumerate = isinstance(k, list) or isinstance(k, tuple) \
+        and len(k) > 0
+    key_prop = {}
+    for i, prop in enumerate(key_names):
+        key_prop.setdefault(prop, k[i] if can_enumerate else k)
+    return Key(key_prop)
+
+
+def _key_filter(outer, inner, key, member):
+    """
+    Yields elements of outer whose key membership in the keys of inner equals
+    member. The keys of inner are hashed once before outer is streamed
+    """
+    keys = KeySet(map(key, inner))
+    for element in outer:
+        if (key(element) in keys) == member:
+            yield element
+
+
+def _symmetric_except(first, second, key):
+    """
+    Yields elements of first whose key is not in second followed by elements
+    of second whose key is not in first
+    """
+    second_keys = KeySet(map(key, second))
+    first_keys = KeySet()
+    for element in first:
+        k = key(element)
+        first_keys.add(k)
+        if k not in second_keys:
+            yield element
+    for element in second:
+        if key(element) not in first_keys:
+            yield element
 
 
 class Enumerable3(object):
@@ -12,37 +401,225 @@ class Enumerable3(object):
     code duplication here. Thought this would be OK design for separation of
     concerns since Python 3 is a distinct codebase from Python 2.
     """
-    def __init__(self, data=[]):
+    def __new__(cls, data=[], *args, **kwargs):
+        # one dimensional numeric NumPy arrays get vectorized operators
+        if cls is Enumerable3 and is_numeric_array(data):
+            cls = NumericEnumerable3
+        return super(Enumerable3, cls).__new__(cls)
+
+    def __init__(self, data=[], cache_policy=u'passthrough'):
         """
         Constructor
         ** Note: no type checking of the data elements are performed during
         instantiation. **
+
+        The cache policy controls what happens when the enumerable is
+        iterated:
+            * 'none': data is iterated directly and nothing is cached. One-shot
+            sources such as generators can only be enumerated once.
+            * 'lazy': elements are memoized the first time they are read and
+            shared by every iterator, like itertools.tee, so one-shot sources
+            can be enumerated any number of times and concurrently.
+            * 'passthrough': Sequence data (list, tuple, range, ...) is iterated
+            directly without copying, any other data is memoized like 'lazy'.
+        Enumerables derived from this one inherit its cache policy.
         :param data: iterable object
+        :param cache_policy: one of 'none', 'lazy' or 'passthrough'
         :return: None
         """
         if not hasattr(data, "__iter__"):
             raise TypeError(
                 u"Enumerable must be instantiated with an iterable object")
+        if cache_policy not in _cache_policies:
+            raise ValueError(
+                u"cache_policy must be one of 'none', 'lazy' or 'passthrough'")
         self._data = data
+        self._cache_policy = cache_policy
+        self._memo = None
 
     @property
     def data(self):
         """
-        The iterable of the Enumerable instance
+        The iterable of the Enumerable instance. Once memoized data has been
+        read completely this is the list of memoized elements
         :return: iterable
         """
         return self._data
 
+    @property
+    def cache_policy(self):
+        """
+        The cache policy of the Enumerable instance
+        :return: 'none', 'lazy' or 'passthrough'
+        """
+        return self._cache_policy
+
+    def with_cache_policy(self, cache_policy):
+        """
+        Returns new Enumerable over the elements of self with the given cache
+        policy. The elements are read through self, so one-shot data is not
+        consumed behind the back of self
+        :param cache_policy: one of 'none', 'lazy' or 'passthrough'
+        :return: new Enumerable object
+        """
+        return Enumerable3(self, cache_policy=cache_policy)
+
+    def as_parallel(self, workers=None, chunk_size=1024, executor=None):
+        """
+        Returns a ParallelEnumerable whose select, where and select_many
+        operators run in chunks across a pool of worker processes. Functions
+        passed to them must be picklable, so module level functions have to
+        be used instead of lambdas
+        :param workers: number of worker processes, defaults to the number of
+        CPUs
+        :param chunk_size: number of elements sent to a worker at a time
+        :param executor: concurrent.futures.Executor to use instead of a new
+        process pool for every enumeration
+        :return: new ParallelEnumerable object
+        """
+        return ParallelEnumerable3(
+            self,
+            workers=workers,
+            chunk_size=chunk_size,
+            executor=executor,
+            cache_policy=self._cache_policy)
+
+    def _derive(self, data):
+        """
+        Returns new Enumerable over data that inherits the cache policy of self
+        :param data: iterable object
+        :return: new Enumerable object
+        """
+        return Enumerable3(data, cache_policy=self._cache_policy)
+
+    def _pipe(self, operator, argument):
+        """
+        Returns new Enumerable that applies a stream operator to self. When
+        self is itself an unread pipeline the stage is appended to it, so a
+        chain of stream operators is executed as one fused iterator over the
+        original source and only the last Enumerable of the chain is cached
+        :param operator: name of the operator, see Pipeline
+        :param argument: function or count of the operator
+        :return: new Enumerable object
+        """
+        pipeline = self._pipeline()
+        if pipeline is not None:
+            return self._derive(pipeline.then(operator, argument))
+        return self._derive(Pipeline(self, ((operator, argument),)))
+
+    def _pipeline(self):
+        """
+        Returns the data if it is a pipeline that has not been read yet, so
+        that operators can extend it instead of wrapping self
+        :return: Pipeline object or None
+        """
+        if isinstance(self._data, Pipeline) and self._memo is None \
+                and type(self).__iter__ is Enumerable3.__iter__:
+            return self._data
+        return None
+
+    def plan(self):
+        """
+        Returns the logical plan of the chain of operators leading to self.
+        Stream operators, sorts and compiled chains are plan nodes, any other
+        Enumerable is a Source leaf. Terminal operators can be added to the
+        plan with count, first and any, and compared with constants
+        :return: py_linq.plan.Node object
+        """
+        if isinstance(self._data, _SortedHead) and self._memo is None:
+            return Stage(
+                u'take', self._data.n, self._data.sorted_enumerable.plan())
+        pipeline = self._pipeline()
+        if pipeline is None:
+            return Source(self)
+        source = pipeline.source
+        node = source.plan() if isinstance(source, Enumerable3) \
+            else Source(self._derive(source))
+        for operator, argument in pipeline.stages:
+            node = Stage(operator, argument, node)
+        if isinstance(pipeline, CompiledPipeline):
+            node = Compile(node)
+        return node
+
+    def explain(self):
+        """
+        Returns the operator tree of the logical plan of self, one operator
+        per line with the operators it reads from indented below it
+        :return: str object
+        """
+        return self.plan().explain()
+
+    def optimize(self, rules=None):
+        """
+        Returns new Enumerable that executes the logical plan of self after
+        rewriting it with the optimizer rules, see py_linq.plan
+        :param rules: list of rule functions, defaults to all built-in rules
+        :return: new Enumerable object
+        """
+        return self.plan().optimize(rules).execute()
+
+    def compile(self):
+        """
+        Returns new Enumerable that executes the chain of stream operators
+        (where, select, skip, take, distinct, skip_while, take_while) leading
+        to self as generated Python code: a single for loop with the
+        predicates and selectors called through local variables. The code is
+        generated once per shape of the chain and cached, so building and
+        compiling the same query repeatedly only pays for code generation
+        once. Stream operators applied to the result are compiled as well,
+        and sum accumulates inside the generated loop.
+        :return: new Enumerable object
+        """
+        pipeline = self._pipeline()
+        if pipeline is None:
+            return self._derive(CompiledPipeline(self))
+        return self._derive(CompiledPipeline(pipeline.source, pipeline.stages))
+
     def __iter__(self):
-        cache = []
-        for element in self._data:
-            cache.append(element)
+        memo = self._memo
+        if memo is not None:
+            return iter(memo.buffer) if memo.source is None \
+                else self._read_memo(memo)
+        if self._cache_policy == u'none' or \
+                self._cache_policy == u'passthrough' and \
+                isinstance(self._data, collections.abc.Sequence):
+            return iter(self._data)
+        memo = self._memo = _Memo(iter(self._data))
+        return self._read_memo(memo)
+
+    def _read_memo(self, memo):
+        buffer = memo.buffer
+        i = 0
+        while True:
+            if i < len(buffer):
+                yield buffer[i]
+                i += 1
+                continue
+            if memo.source is None:
+                return
+            try:
+                element = next(memo.source)
+            except StopIteration:
+                memo.source = None
+                self._data = buffer
+                return
+            buffer.append(element)
+            i += 1
             yield element
-        self._data = cache
 
     def __repr__(self):
         return self._data.__repr__()
 
+    def _sequence(self):
+        """
+        Returns the data if it is a Sequence whose indexes match the iteration
+        order of the enumerable, so positional operators can index it directly
+        :return: Sequence object or None
+        """
+        if isinstance(self._data, collections.abc.Sequence):
+            return self._data
+        return None
+
     def to_list(self):
         """
         Converts the iterable into a list
@@ -50,11 +627,52 @@ class Enumerable3(object):
         """
         return list(element for element in self)
 
+    def to_set(self):
+        """
+        Converts the iterable into a set
+        :return: set object
+        """
+        return set(self)
+
+    def to_dictionary(self, key=lambda x: x, value_func=lambda x: x):
+        """
+        Converts the iterable into a dictionary
+            * Raises DuplicateKeyError if two elements have the same key
+        :param key: key selector as lambda expression
+        :param value_func: value selector as lambda expression
+        :return: dict object
+        """
+        result = {}
+        for element in self:
+            k = key(element)
+            if k in result:
+                raise DuplicateKeyError(
+                    u"An element with key {0} was already added".format(k))
+            result[k] = value_func(element)
+        return result
+
+    def to_lookup(self, key=lambda x: x, element_func=lambda x: x, key_names=[]):
+        """
+        Converts the iterable into a lookup of key -> elements. Probing a key
+        costs O(1) instead of a scan over the iterable
+        :param key: key selector as lambda expression
+        :param element_func: element selector as lambda expression
+        :param key_names: list of key names of the groupings, as in group_by
+        :return: Lookup object
+        """
+        table = KeyTable()
+        for element in self:
+            table.add(key(element), element_func(element))
+        return Lookup3(table, key_names)
+
     def count(self):
         """
         Returns the number of elements in iterable
         :return: integer object
         """
+        sequence = self._sequence()
+        if sequence is not None:
+            return len(sequence)
         return sum(1 for element in self)
 
     def select(self, func=lambda x: x):
@@ -63,7 +681,7 @@ class Enumerable3(object):
         :param func: lambda expression on how to perform transformation
         :return: new Enumerable object containing transformed data
         """
-        return Enumerable3(map(func, self))
+        return self._pipe(u'select', func)
 
     def sum(self, func=lambda x: x):
         """
@@ -71,7 +689,10 @@ class Enumerable3(object):
         :param func: lambda expression to transform data
         :return: sum of selected elements
         """
-        return sum(self.select(func))
+        pipeline = self._pipeline()
+        if isinstance(pipeline, CompiledPipeline):
+            return pipeline.then(u'select', func).sum()
+        return sum(map(func, self))
 
     def min(self, func=lambda x: x):
         """
@@ -79,9 +700,10 @@ class Enumerable3(object):
         :param func: lambda expression to transform data
         :return: minimum value
         """
-        if self.count() == 0:
+        result = _extreme(min, map(func, self))
+        if result is _missing:
             raise NoElementsError(u"Iterable contains no elements")
-        return min(self.select(func))
+        return result
 
     def max(self, func=lambda x: x):
         """
@@ -89,9 +711,10 @@ class Enumerable3(object):
         :param func: lambda expression to transform data
         :return: maximum value
         """
-        if self.count() == 0:
+        result = _extreme(max, map(func, self))
+        if result is _missing:
             raise NoElementsError(u"Iterable contains no elements")
-        return max(self.select(func))
+        return result
 
     def avg(self, func=lambda x: x):
         """
@@ -99,35 +722,131 @@ class Enumerable3(object):
         :param func: lambda expression to transform data
         :return: average value as float object
         """
-        count = self.count()
-        if count == 0:
-            raise NoElementsError(u"Iterable contains no elements")
-        return float(self.sum(func)) / float(count)
+        return _fold_statistics(map(func, self), extremes=False).mean
+
+    def stats(self, func=lambda x: x, variance=False):
+        """
+        Returns count, sum, min, max and mean of data elements computed in a
+        single pass
+            * Raises NoElementsError if enumerable contains no elements
+        :param func: lambda expression to transform data
+        :param variance: True to also compute the population variance
+        :return: Statistics object
+        """
+        return _fold_statistics(map(func, self), variance=variance)
 
     def median(self, func=lambda x: x):
         """
-        Return the median value of data elements
+        Return the median value of data elements. Uses a selection algorithm
+        so that the elements do not need to be fully sorted
         :param func: lambda expression to project and sort data
         :return: median value
         """
-        if self.count() == 0:
+        values = list(map(func, self))
+        length = len(values)
+        if length == 0:
             raise NoElementsError(u"Iterable contains no elements")
-        result = self.order_by(func).select(func).to_list()
-        length = len(result)
-        i = int(length / 2)
-        return result[i] if length % 2 == 1 else (float(result[i - 1]) + float(result[i])) / float(2)
+        i = length // 2
+        if length % 2 == 1:
+            return _order_statistics(values, [i])[i]
+        result = _order_statistics(values, [i - 1, i])
+        return (float(result[i - 1]) + float(result[i])) / float(2)
+
+    def quantile(self, q, func=lambda x: x):
+        """
+        Return the q-th quantile of data elements, interpolating linearly
+        between the two closest ranks
+            * Raises NoElementsError if enumerable contains no elements
+            * Raises ValueError if q is not between 0 and 1
+        :param q: quantile between 0 and 1
+        :param func: lambda expression to project data
+        :return: quantile value
+        """
+        return _quantiles(list(map(func, self)), [q])[0]
+
+    def percentiles(self, percents, func=lambda x: x):
+        """
+        Return several percentiles of data elements computed from a single
+        partitioning pass, interpolating linearly between the two closest
+        ranks
+            * Raises NoElementsError if enumerable contains no elements
+            * Raises ValueError if a percent is not between 0 and 100
+        :param percents: list of percents between 0 and 100
+        :param func: lambda expression to project data
+        :return: list of percentile values in the order of percents
+        """
+        for p in percents:
+            if not 0 <= p <= 100:
+                raise ValueError(u"percent must be between 0 and 100")
+        return _quantiles(
+            list(map(func, self)),
+            [p / float(100) for p in percents])
+
+    def to_tdigest(self, func=lambda x: x, compression=100):
+        """
+        Summarizes data elements in a mergeable t-digest sketch that uses
+        memory bounded by compression. Sketches built over separate partitions
+        can be combined with TDigest.merge. The elements are read in a single
+        pass, but unless the cache policy is 'none' an Enumerable over a
+        generator still caches every element it reads, so the policy must be
+        'none' for memory to stay bounded over long sources
+        :param func: lambda expression to project data
+        :param compression: accuracy parameter of the sketch
+        :return: TDigest object
+        """
+        digest = TDigest(compression)
+        digest.update(map(func, self))
+        return digest
+
+    def approx_quantile(self, q, func=lambda x: x, compression=100):
+        """
+        Return the approximate q-th quantile of data elements computed with a
+        t-digest sketch. See TDigest for the error bounds and to_tdigest for
+        the memory used
+            * Raises NoElementsError if enumerable contains no elements
+            * Raises ValueError if q is not between 0 and 1
+        :param q: quantile between 0 and 1
+        :param func: lambda expression to project data
+        :param compression: accuracy parameter of the sketch
+        :return: approximate quantile value
+        """
+        return self.to_tdigest(func, compression).quantile(q)
+
+    def approx_percentiles(self, percents, func=lambda x: x, compression=100):
+        """
+        Return several approximate percentiles of data elements computed from
+        a single t-digest sketch. See TDigest for the error bounds and
+        to_tdigest for the memory used
+            * Raises NoElementsError if enumerable contains no elements
+            * Raises ValueError if a percent is not between 0 and 100
+        :param percents: list of percents between 0 and 100
+        :param func: lambda expression to project data
+        :param compression: accuracy parameter of the sketch
+        :return: list of approximate percentile values in the order of percents
+        """
+        for p in percents:
+            if not 0 <= p <= 100:
+                raise ValueError(u"percent must be between 0 and 100")
+        digest = self.to_tdigest(func, compression)
+        return [digest.quantile(p / float(100)) for p in percents]
 
     def element_at(self, n):
         """
-        Returns element at given index.
+        Returns element at given index. Sequences are indexed directly, other
+        sources are iterated only up to the given index.
             * Raises NoElementsError if no element found at specified position
         :param n: index as int object
         :return: Element at given index
         """
-        result = list(itertools.islice(self.to_list(), max(0, n), n + 1, 1))
-        if len(result) == 0:
-            raise NoElementsError(u"No element found at index {0}".format(n))
-        return result[0]
+        if n >= 0:
+            sequence = self._sequence()
+            if sequence is not None:
+                if n < len(sequence):
+                    return sequence[n]
+            else:
+                for element in itertools.islice(self, n, n + 1):
+                    return element
+        raise NoElementsError(u"No element found at index {0}".format(n))
 
     def element_at_or_default(self, n):
         """
@@ -144,11 +863,13 @@ class Enumerable3(object):
 
     def first(self):
         """
-        Returns the first element
+        Returns the first element. Stops iterating after the first element.
         :return: data element as object or NoElementsError if transformed data
         contains no elements
         """
-        return self.element_at(0)
+        for element in self:
+            return element
+        raise NoElementsError(u"No element found at index 0")
 
     def first_or_default(self):
         """
@@ -156,15 +877,27 @@ class Enumerable3(object):
         :return: data element as object or None if transformed data contains
         no elements
         """
-        return self.element_at_or_default(0)
+        try:
+            return self.first()
+        except NoElementsError:
+            return None
 
     def last(self):
         """
-        Return the last element
+        Return the last element. Sequences are indexed directly, other sources
+        are streamed keeping only the latest element.
         :return: data element as object or NoElementsError if transformed data
         contains no elements
         """
-        return Enumerable3(reversed(self.to_list())).first()
+        sequence = self._sequence()
+        if sequence is not None:
+            if len(sequence) > 0:
+                return sequence[-1]
+        else:
+            last = collections.deque(self, maxlen=1)
+            if len(last) > 0:
+                return last[0]
+        raise NoElementsError(u"Iterable contains no elements")
 
     def last_or_default(self):
         """
@@ -172,7 +905,10 @@ class Enumerable3(object):
         :return: data element as object or None if transformed data contains no
         elements
         """
-        return Enumerable3(reversed(self.to_list())).first_or_default()
+        try:
+            return self.last()
+        except NoElementsError:
+            return None
 
     def order_by(self, key):
         """
@@ -182,8 +918,7 @@ class Enumerable3(object):
         """
         if key is None:
             raise NullArgumentError(u"No key for sorting given")
-        kf = [OrderingDirection(key, reverse=False)]
-        return SortedEnumerable3(kf, self._data)
+        return self._order([OrderingDirection(key, reverse=False)])
 
     def order_by_descending(self, key):
         """
@@ -193,8 +928,49 @@ class Enumerable3(object):
         """
         if key is None:
             raise NullArgumentError(u"No key for sorting given")
-        kf = [OrderingDirection(key, reverse=True)]
-        return SortedEnumerable3(kf, self._data)
+        return self._order([OrderingDirection(key, reverse=True)])
+
+    def _order(self, key_funcs):
+        """
+        Returns new Enumerable sorted by a chain of keys
+        :param key_funcs: sequence of OrderingDirection instances
+        :return: new SortedEnumerable object
+        """
+        return SortedEnumerable3(list(key_funcs), self, self._cache_policy)
+
+    def _min_by(self, key_funcs):
+        """
+        Returns the first element in the order of a chain of keys in a single
+        pass. min and max keep the first of equal elements like a stable sort
+        :param key_funcs: sequence of OrderingDirection instances
+        :return: data element as object or NoElementsError if transformed data
+        contains no elements
+        """
+        key, reverse = _sort_key(tuple(key_funcs))
+        result = _extreme(max if reverse else min, self, key)
+        if result is _missing:
+            raise NoElementsError(u"No element found at index 0")
+        return result
+
+    def top_k(self, k, key=lambda x: x):
+        """
+        Returns new Enumerable of the k elements with the largest keys in
+        descending key order. Uses a bounded heap instead of a full sort
+        :param k: number of elements to take
+        :param key: key to rank by as lambda expression
+        :return: new Enumerable object
+        """
+        return self.order_by_descending(key).take(k)
+
+    def bottom_k(self, k, key=lambda x: x):
+        """
+        Returns new Enumerable of the k elements with the smallest keys in
+        ascending key order. Uses a bounded heap instead of a full sort
+        :param k: number of elements to take
+        :param key: key to rank by as lambda expression
+        :return: new Enumerable object
+        """
+        return self.order_by(key).take(k)
 
     def skip(self, n):
         """
@@ -202,7 +978,7 @@ class Enumerable3(object):
         :param n: Number of elements to skip as int
         :return: new Enumerable object
         """
-        return Enumerable3(itertools.islice(self, n, None, 1))
+        return self._pipe(u'skip', n)
 
     def take(self, n):
         """
@@ -210,7 +986,7 @@ class Enumerable3(object):
         :param n: Number of elements to take
         :return: new Enumerable object
         """
-        return Enumerable3(itertools.islice(self, 0, n, 1))
+        return self._pipe(u'take', n)
 
     def where(self, predicate):
         """
@@ -220,11 +996,12 @@ class Enumerable3(object):
         """
         if predicate is None:
             raise NullArgumentError(u"No predicate given for where clause")
-        return Enumerable3(filter(predicate, self))
+        return self._pipe(u'where', predicate)
 
     def single(self, predicate):
         """
-        Returns single element that matches given predicate.
+        Returns single element that matches given predicate. Stops iterating
+        at the second matching element.
         Raises:
             * NoMatchingElement error if no matching elements are found
             * MoreThanOneMatchingElement error if more than one matching
@@ -232,7 +1009,7 @@ class Enumerable3(object):
         :param predicate: predicate as a lambda expression
         :return: Matching element as object
         """
-        result = self.where(predicate).to_list()
+        result = self.where(predicate).take(2).to_list()
         count = len(result)
         if count == 0:
             raise NoMatchingElement(u"No matching element found")
@@ -262,7 +1039,45 @@ class Enumerable3(object):
         :param func: selector as lambda expression
         :return: new Enumerable object
         """
-        return Enumerable3(itertools.chain.from_iterable(self.select(func)))
+        return self._pipe(u'select_many', func)
+
+    def select_concurrent(
+            self,
+            func,
+            max_workers=None,
+            ordered=True,
+            prefetch=None,
+            return_exceptions=False
+    ):
+        """
+        Transforms data on a thread pool, for I/O bound selectors. Elements
+        are read lazily and at most prefetch calls are in flight at a time.
+        The results are not cached, the returned Enumerable and Enumerables
+        derived from it have the 'none' cache policy and every enumeration
+        calls func again, so memory stays flat for long and infinite sources
+        as long as self does not cache them either
+        :param func: selector as lambda expression
+        :param max_workers: number of threads, defaults to the default of
+        concurrent.futures.ThreadPoolExecutor
+        :param ordered: True to yield results in the order of the elements,
+        False to yield them as soon as they are done
+        :param prefetch: maximum number of calls in flight, defaults to twice
+        max_workers
+        :param return_exceptions: True to yield the exception raised by func
+        for an element in place of its result instead of raising it
+        :return: new Enumerable object
+        """
+        if func is None:
+            raise NullArgumentError(u"No selector given for select_concurrent")
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(u"max_workers must be at least 1")
+        if prefetch is not None and prefetch < 1:
+            raise ValueError(u"prefetch must be at least 1")
+        return Enumerable3(
+            _Generated(
+                _select_concurrent,
+                self, func, max_workers, ordered, prefetch, return_exceptions),
+            cache_policy=u'none')
 
     def add(self, element):
         """
@@ -283,13 +1098,24 @@ class Enumerable3(object):
         if not isinstance(enumerable, Enumerable3):
             raise TypeError(
                 u"enumerable argument must be an instance of Enumerable")
-        return Enumerable3(itertools.chain(self._data, enumerable.data))
+        return self._derive(itertools.chain(self, enumerable))
 
-    def group_by(self, key_names=[], key=lambda x: x, result_func=lambda x: x):
+    def group_by(
+            self,
+            key_names=[],
+            key=lambda x: x,
+            result_func=lambda x: x,
+            ordered_keys=False
+    ):
         """
         Groups an enumerable on given key selector. Index of key name
         corresponds to index of key lambda function.
 
+        By default elements are grouped in a single pass into hash buckets and
+        groups are returned in order of first key occurrence. Keys do not have
+        to be sortable. Setting ordered_keys to True sorts the elements by key
+        first and returns the groups in ascending key order.
+
         Usage:
             Enumerable([1,2,3]).group_by(key_names=['id'], key=lambda x: x) _
                 .to_list() --> Enumerable object [
@@ -316,73 +1142,80 @@ class Enumerable3(object):
         :param key: key selector as lambda expression
         :param result_func: lambda function to transform group_join into
         desired structure
+        :param ordered_keys: True to return groups sorted by key
         :return: Enumerable of grouping objects
         """
         result = []
-        ordered = sorted(self, key=key)
-        grouped = itertools.groupby(ordered, key)
+        if ordered_keys:
+            grouped = itertools.groupby(sorted(self, key=key), key)
+        else:
+            table = KeyTable()
+            for element in self:
+                table.add(key(element), element)
+            grouped = table.items()
         for k, g in grouped:
-            can_enumerate = isinstance(k, list) or isinstance(k, tuple) \
-                and len(k) > 0
-            key_prop = {}
-            for i, prop in enumerate(key_names):
-                key_prop.setdefault(prop, k[i] if can_enumerate else k)
-            key_object = Key(key_prop)
-            result.append(Grouping3(key_object, list(g)))
-        return Enumerable3(result).select(result_func)
+            result.append(Grouping3(_key_object(k, key_names), list(g)))
+        return self._derive(result).select(result_func)
 
     def distinct(self, key=lambda x: x):
         """
         Returns enumerable containing elements that are distinct based on given
-        key selector
+        key selector. Elements are streamed and the first occurrence of every
+        key is yielded as soon as it is seen.
         :param key: key selector as lambda expression
         :return: new Enumerable object
         """
-        return Enumerable3(self.group_by(key=key).select(lambda g: g.first()).to_list())
+        return self._pipe(u'distinct', key)
 
     def join(
             self,
             inner_enumerable,
             outer_key=lambda x: x,
             inner_key=lambda x: x,
-            result_func=lambda x: x
+            result_func=lambda x: x,
+            build_side=u'inner'
     ):
         """
-        Return enumerable of inner equi-join between two enumerables
+        Return enumerable of inner equi-join between two enumerables. The join
+        is a hash join: one side is hashed on its key once and the other side
+        is streamed against it. Results are ordered by outer element and then
+        by inner element regardless of the build side.
         :param inner_enumerable: inner enumerable to join to self
         :param outer_key: key selector of outer enumerable as lambda expression
         :param inner_key: key selector of inner enumerable as lambda expression
         :param result_func: lambda expression to transform result of join
+        :param build_side: side to hash as 'inner', 'outer' or 'auto'. 'auto'
+        hashes the smaller side when both lengths are known, otherwise inner
         :return: new Enumerable object
         """
         if not isinstance(inner_enumerable, Enumerable3):
             raise TypeError(
                 u"inner_enumerable parameter must be an instance of Enumerable"
             )
-        return Enumerable3(
-            itertools.product(
-                filter(
-                    lambda x: outer_key(x) in map(inner_key, inner_enumerable),
-                    self
-                ),
-                filter(
-                    lambda y: inner_key(y) in map(outer_key, self),
-                    inner_enumerable
-                )
-            )
-        )\
-            .where(lambda x: outer_key(x[0]) == inner_key(x[1]))\
-            .select(result_func)
+        if build_side == u'auto':
+            outer_length = _length(self._data)
+            inner_length = _length(inner_enumerable.data)
+            build_side = u'outer' \
+                if outer_length is not None and inner_length is not None \
+                and outer_length < inner_length else u'inner'
+        if build_side == u'inner':
+            engine = _hash_join_build_inner
+        elif build_side == u'outer':
+            engine = _hash_join_build_outer
+        else:
+            raise ValueError(
+                u"build_side must be one of 'inner', 'outer' or 'auto'")
+        return self._derive(
+            engine(self, inner_enumerable, outer_key, inner_key)
+        ).select(result_func)
 
     def default_if_empty(self, value=None):
         """
         Returns an enumerable containing a single None element if enumerable is
-        empty, otherwise the enumerable itself
+        empty, otherwise the elements of the enumerable
         :return: an Enumerable object
         """
-        if self.count() == 0:
-            return Enumerable3([value])
-        return self
+        return self._derive(_default_if_empty(self, value))
 
     def group_join(
             self,
@@ -392,7 +1225,10 @@ class Enumerable3(object):
             result_func=lambda x: x
     ):
         """
-        Return enumerable of group join between two enumerables
+        Return enumerable of group join between two enumerables. The inner
+        enumerable is hashed on its key once and every outer element is
+        paired with an Enumerable of its matching inner elements, in outer
+        order
         :param inner_enumerable: inner enumerable to join to self
         :param outer_key: key selector of outer enumerable as lambda expression
         :param inner_key: key selector of inner enumerable as lambda expression
@@ -404,37 +1240,56 @@ class Enumerable3(object):
             raise TypeError(
                 u"inner enumerable parameter must be an instance of Enumerable"
             )
-        return Enumerable3(
-            itertools.product(
-                self,
-                inner_enumerable.default_if_empty()
-            )
-        ).group_by(
-            key_names=['id'],
-            key=lambda x: outer_key(x[0]),
-            result_func=lambda g: (
-                g.first()[0],
-                g.where(lambda x: inner_key(x[1]) == g.key.id).select(
-                    lambda x: x[1]
-                )
-            )
+        return self._derive(
+            _group_join(self, inner_enumerable, outer_key, inner_key)
         ).select(result_func)
 
     def any(self, predicate):
         """
-        Returns true if any elements that satisfy predicate are found
+        Returns true if any elements that satisfy predicate are found. Stops
+        iterating at the first element that satisfies predicate.
         :param predicate: condition to satisfy as lambda expression
         :return: boolean True or False
         """
         if predicate is None:
             raise NullArgumentError(
                 u"predicate lambda expression is necessary")
-        return self.where(predicate).count() > 0
+        return any(map(predicate, self))
+
+    def to_hyperloglog(self, key=lambda x: x, precision=14, use_numpy=None):
+        """
+        Summarizes the keys of data elements in a mergeable HyperLogLog sketch
+        that uses 2**precision bytes of memory. Sketches built over separate
+        partitions can be combined with HyperLogLog.merge. The keys are read
+        in a single pass, but unless the cache policy is 'none' an Enumerable
+        over a generator still caches every element it reads, so the policy
+        must be 'none' for memory to stay bounded over long sources
+        :param key: key selector as lambda expression
+        :param precision: number of index bits of the sketch between 4 and 18
+        :param use_numpy: True to require vectorized hashing, False to never
+        use it and None to use it when NumPy is installed
+        :return: HyperLogLog object
+        """
+        sketch = HyperLogLog(precision)
+        sketch.update(map(key, self), use_numpy=use_numpy)
+        return sketch
+
+    def approx_count_distinct(self, key=lambda x: x, precision=14):
+        """
+        Returns the approximate number of distinct keys computed with a
+        HyperLogLog sketch. The standard error is about
+        1.04 / sqrt(2**precision). See to_hyperloglog for the memory used
+        :param key: key selector as lambda expression
+        :param precision: number of index bits of the sketch between 4 and 18
+        :return: integer object
+        """
+        return self.to_hyperloglog(key, precision).count()
 
     def intersect(self, enumerable, key=lambda x: x):
         """
         Returns enumerable that is the intersection between given enumerable
-        and self
+        and self. The keys of enumerable are hashed once and the elements of
+        self are streamed against them.
         :param enumerable: enumerable object
         :param key: key selector as lambda expression
         :return: new Enumerable object
@@ -442,7 +1297,7 @@ class Enumerable3(object):
         if not isinstance(enumerable, Enumerable3):
             raise TypeError(
                 u"enumerable parameter must be an instance of Enumerable")
-        return self.join(enumerable, key, key).select(lambda x: x[0])
+        return self._derive(_key_filter(self, enumerable, key, True))
 
     def union(self, enumerable, key=lambda x: x):
         """
@@ -455,15 +1310,13 @@ class Enumerable3(object):
         if not isinstance(enumerable, Enumerable3):
             raise TypeError(
                 u"enumerable parameter must be an instance of Enumerable")
-        if self.count() == 0:
-            return enumerable
-        if enumerable.count() == 0:
-            return self
-        return self.concat(enumerable).distinct(key)
+        return self._derive(_distinct(itertools.chain(self, enumerable), key))
 
     def except_(self, enumerable, key=lambda x: x):
         """
-        Returns enumerable that subtracts given enumerable elements from self
+        Returns enumerable that subtracts given enumerable elements from self.
+        The keys of enumerable are hashed once and the elements of self are
+        streamed against them.
         :param enumerable: enumerable object
         :param key: key selector as lambda expression
         :return: new Enumerable object
@@ -471,25 +1324,32 @@ class Enumerable3(object):
         if not isinstance(enumerable, Enumerable3):
             raise TypeError(
                 u"enumerable parameter must be an instance of Enumerable")
-        membership = (
-            0 if key(element) in enumerable.intersect(self, key).select(key) else 1
-            for element in self
-        )
-        return Enumerable3(
-            itertools.compress(
-                self,
-                membership
-            )
-        )
+        return self._derive(_key_filter(self, enumerable, key, False))
+
+    def symmetric_except(self, enumerable, key=lambda x: x):
+        """
+        Returns enumerable of the elements of self that are not in given
+        enumerable followed by the elements of given enumerable that are not in
+        self
+        :param enumerable: enumerable object
+        :param key: key selector as lambda expression
+        :return: new Enumerable object
+        """
+        if not isinstance(enumerable, Enumerable3):
+            raise TypeError(
+                u"enumerable parameter must be an instance of Enumerable")
+        return self._derive(_symmetric_except(self, enumerable, key))
 
     def contains(self, element, key=lambda x: x):
         """
-        Returns True if element is found in enumerable, otherwise False
+        Returns True if element is found in enumerable, otherwise False. Stops
+        iterating at the first match.
         :param element: the element being tested for membership in enumerable
         :param key: key selector to use for membership comparison
         :return: boolean True or False
         """
-        return self.select(key).any(lambda x: x == key(element))
+        value = key(element)
+        return any(key(e) == value for e in self)
 
     def aggregate(self, func, seed=None):
         """
@@ -501,23 +1361,27 @@ class Enumerable3(object):
         first element is used as the seed
         :return: result of the calculation
         """
-        if self.count() == 0:
+        iterator = iter(self)
+        first = next(iterator, _missing)
+        if first is _missing:
             raise NoElementsError("No elements perform aggregation")
-        result = seed if seed is not None else self.first()
-        for i, e in enumerate(self):
-            if i == 0 and seed is None:
-                continue
+        result = first if seed is None else func(seed, first)
+        for e in iterator:
             result = func(result, e)
         return result
 
     def all(self, predicate):
         """
         Determines whether all elements in an enumerable satisfy the given
-        predicate
+        predicate. Stops iterating at the first element that does not satisfy
+        predicate.
         :param predicate: the condition to test each element as lambda function
         :return: boolean True or False
         """
-        return self.where(predicate).count() == self.count()
+        if predicate is None:
+            raise NullArgumentError(
+                u"predicate lambda expression is necessary")
+        return all(map(predicate, self))
 
     def append(self, element):
         """
@@ -543,6 +1407,19 @@ class Enumerable3(object):
         """
         return Enumerable3()
 
+    @staticmethod
+    def from_array(data, dtype=None):
+        """
+        Returns an Enumerable over a NumPy array of numbers whose
+        aggregations, comparisons and simple projections run as vectorized
+        NumPy kernels
+            * Raises ImportError if NumPy is not installed
+        :param data: NumPy array or iterable of numbers
+        :param dtype: NumPy dtype of the array, inferred from data if None
+        :return: NumericEnumerable object
+        """
+        return NumericEnumerable3(data, dtype=dtype)
+
     @staticmethod
     def range(start, length):
         """
@@ -568,15 +1445,28 @@ class Enumerable3(object):
         Inverts the order of the elements in a sequence
         :return: Enumerable with elements in reversed order
         """
-        return self.aggregate(lambda *args: args[0].prepend(args[1]), Enumerable3())
+        return self._derive(_reverse(self))
+
+    def reversed_view(self):
+        """
+        Returns an enumerable over a reversed view of the data. For sequence
+        backed enumerables the view is created in O(1) and supports O(1)
+        positional access. Other sources fall back to reverse
+        :return: Enumerable with elements in reversed order
+        """
+        sequence = self._sequence()
+        if sequence is None:
+            return self.reverse()
+        return self._derive(ReversedView(sequence))
 
     def skip_last(self, n):
         """
-        Skips the last n elements in a sequence
+        Skips the last n elements in a sequence. Only n elements are buffered
+        while streaming.
         :param n: the number of elements to skip
         :return: Enumerable with n last elements removed
         """
-        return self.take(self.count() - n)
+        return self._derive(_skip_last(self, n))
 
     def skip_while(self, predicate):
         """
@@ -585,15 +1475,16 @@ class Enumerable3(object):
         :param predicate: a predicate as a lambda expression
         :return: Enumerable
         """
-        return Enumerable3(itertools.dropwhile(predicate, self))
+        return self._pipe(u'skip_while', predicate)
 
     def take_last(self, n):
         """
-        Takes the last n elements in a sequence
+        Takes the last n elements in a sequence. Only n elements are buffered
+        while streaming.
         :param n: the number of elements to take
         :return: Enumerable containing last n elements
         """
-        return self.skip(self.count() - n)
+        return self._derive(_take_last(self, n))
 
     def take_while(self, predicate):
         """
@@ -602,7 +1493,7 @@ class Enumerable3(object):
         :param predicate: a predicate as a lambda expression
         :return: Enumerable
         """
-        return Enumerable3(itertools.takewhile(predicate, self))
+        return self._pipe(u'take_while', predicate)
 
     def zip(self, enumerable, func):
         """
@@ -614,7 +1505,7 @@ class Enumerable3(object):
         """
         if not isinstance(enumerable, Enumerable3):
             raise TypeError()
-        return Enumerable3(itertools.zip_longest(self, enumerable)) \
+        return self._derive(itertools.zip_longest(self, enumerable)) \
             .where(lambda x: x[0] is not None and x[1] is not None) \
             .select(lambda x: func(x))
 
@@ -640,33 +1531,682 @@ class Grouping3(Enumerable3):
         }.__repr__()
 
 
+class Lookup3(Enumerable3):
+    def __init__(self, table, key_names=[]):
+        """
+        Constructor of Lookup class used for keyed access to groups of
+        elements. Iterating a Lookup yields a Grouping per key in order of
+        first key occurrence
+        :param table: KeyTable of key -> list of elements
+        :param key_names: list of key names of the groupings
+        :return: void
+        """
+        if not isinstance(table, KeyTable):
+            raise TypeError(u"table argument should be a KeyTable instance")
+        self._table = table
+        super(Lookup3, self).__init__([
+            Grouping3(_key_object(k, key_names), elements)
+            for k, elements in table.items()
+        ])
+
+    def __getitem__(self, key):
+        """
+        Returns the elements with the given key
+        :param key: the key to look up
+        :return: Enumerable of elements, empty if the key is not found
+        """
+        return Enumerable3(self._table.get(key, []))
+
+    def __contains__(self, key):
+        return key in self._table
+
+    def __len__(self):
+        return len(self._table)
+
+    def contains_key(self, key):
+        """
+        Determines whether the lookup contains the given key
+        :param key: the key to look up
+        :return: boolean True or False
+        """
+        return key in self._table
+
+
+class _HashIndex(object):
+    """
+    Equality index of key -> elements in insertion order
+    """
+    def __init__(self, key, data):
+        self.key = key
+        self._table = KeyTable()
+        for element in data:
+            self.insert(element)
+
+    def insert(self, element):
+        self._table.add(self.key(element), element)
+
+    def equal(self, value):
+        return list(self._table.get(value, []))
+
+
+class _SortedIndex(object):
+    """
+    Range index of elements kept sorted by key, searched with bisect. Elements
+    with equal keys stay in insertion order
+    """
+    def __init__(self, key, data):
+        self.key = key
+        pairs = sorted(
+            ((key(element), element) for element in data),
+            key=lambda pair: pair[0])
+        self._keys = [pair[0] for pair in pairs]
+        self._elements = [pair[1] for pair in pairs]
+
+    def insert(self, element):
+        k = self.key(element)
+        i = bisect.bisect_right(self._keys, k)
+        self._keys.insert(i, k)
+        self._elements.insert(i, element)
+
+    def equal(self, value):
+        return self.range(value, value, True)
+
+    def range(self, lo, hi, inclusive=False):
+        i = 0 if lo is None else bisect.bisect_left(self._keys, lo)
+        if hi is None:
+            j = len(self._keys)
+        elif inclusive:
+            j = bisect.bisect_right(self._keys, hi)
+        else:
+            j = bisect.bisect_left(self._keys, hi)
+        return self._elements[i:j]
+
+
+class IndexedEnumerable3(Enumerable3):
+    def __init__(self, data=[]):
+        """
+        Constructor of an in-memory Enumerable with secondary indexes on key
+        selectors. Hash indexes answer equality queries and sorted indexes
+        answer range queries without scanning the data. Unlike other
+        Enumerables, append and add modify an IndexedEnumerable in place and
+        update every index incrementally.
+        :param data: iterable object, copied into a list
+        :return: void
+        """
+        if not hasattr(data, "__iter__"):
+            raise TypeError(
+                u"Enumerable must be instantiated with an iterable object")
+        self._indexes = {}
+        super(IndexedEnumerable3, self).__init__(list(data))
+
+    def add_hash_index(self, name, key):
+        """
+        Declares an equality index on a key selector
+        :param name: name of the index
+        :param key: key selector as lambda expression
+        :return: self
+        """
+        if key is None:
+            raise NullArgumentError(u"No key given for index")
+        self._indexes[name] = _HashIndex(key, self._data)
+        return self
+
+    def add_sorted_index(self, name, key):
+        """
+        Declares a range index on a key selector. Keys must be sortable
+        :param name: name of the index
+        :param key: key selector as lambda expression
+        :return: self
+        """
+        if key is None:
+            raise NullArgumentError(u"No key given for index")
+        self._indexes[name] = _SortedIndex(key, self._data)
+        return self
+
+    def drop_index(self, name):
+        """
+        Removes an index
+        :param name: name of the index
+        :return: self
+        """
+        del self._indexes[name]
+        return self
+
+    def _index(self, name):
+        try:
+            return self._indexes[name]
+        except KeyError:
+            raise KeyError(u"No index named {0}".format(name))
+
+    def where_eq(self, index, value):
+        """
+        Returns new Enumerable of the elements whose indexed key equals value,
+        looked up in the index instead of scanning the data
+        :param index: name of a hash or sorted index
+        :param value: key value to match
+        :return: new Enumerable object
+        """
+        return Enumerable3(self._index(index).equal(value))
+
+    def where_range(self, index, lo=None, hi=None):
+        """
+        Returns new Enumerable of the elements whose indexed key k satisfies
+        lo <= k < hi, in ascending key order, found by bisecting a sorted index
+        :param index: name of a sorted index
+        :param lo: inclusive lower bound or None for no lower bound
+        :param hi: exclusive upper bound or None for no upper bound
+        :return: new Enumerable object
+        """
+        found = self._index(index)
+        if not isinstance(found, _SortedIndex):
+            raise TypeError(u"where_range requires a sorted index")
+        return Enumerable3(found.range(lo, hi))
+
+    def append(self, element):
+        """
+        Appends an element in place and updates every index
+        :param element: the element to append
+        :return: self
+        """
+        self._data.append(element)
+        for index in self._indexes.values():
+            index.insert(element)
+        return self
+
+    def add(self, element):
+        """
+        Adds an element in place and updates every index. None is ignored
+        :param element: An element
+        :return: self
+        """
+        if element is None:
+            return self
+        return self.append(element)
+
+
+class ParallelEnumerable3(Enumerable3):
+    def __init__(
+            self,
+            data=[],
+            workers=None,
+            chunk_size=1024,
+            ordered=True,
+            executor=None,
+            cache_policy=u'passthrough'
+    ):
+        """
+        Enumerable whose select, where and select_many operators run in
+        parallel. The data is read in the calling process and sent to a
+        concurrent.futures.ProcessPoolExecutor in chunks, with at most two
+        chunks per worker in flight. Any other operator runs sequentially in
+        the calling process over the parallel results. The results are not
+        cached: every enumeration runs the query again, and stopping an
+        enumeration early waits for the chunks in flight, at most two per
+        worker, and shuts down the pool it created.
+        :param data: iterable object
+        :param workers: number of worker processes, defaults to the number of
+        CPUs
+        :param chunk_size: number of elements sent to a worker at a time
+        :param ordered: True to keep the order of data, False to yield the
+        results of each chunk as soon as it is done
+        :param executor: concurrent.futures.Executor to use instead of a new
+        process pool for every enumeration
+        :param cache_policy: cache policy of Enumerables derived by the
+        sequential operators
+        :return: void
+        """
+        if not hasattr(data, "__iter__"):
+            raise TypeError(
+                u"Enumerable must be instantiated with an iterable object")
+        query = data if isinstance(data, ParallelQuery) else ParallelQuery(
+            data, (), workers, chunk_size, ordered, executor)
+        super(ParallelEnumerable3, self).__init__(query, cache_policy)
+        self._query = query
+
+    def _parallel(self, query):
+        return ParallelEnumerable3(query, cache_policy=self._cache_policy)
+
+    def __iter__(self):
+        return iter(self._query)
+
+    @property
+    def is_ordered(self):
+        """
+        Whether the results keep the order of the data
+        :return: boolean object
+        """
+        return self._query.ordered
+
+    def select(self, func=lambda x: x):
+        """
+        Transforms data into different form in parallel. func must be
+        picklable
+        :param func: function on how to perform transformation
+        :return: new ParallelEnumerable object
+        """
+        return self._parallel(self._query.then(u'select', func))
+
+    def where(self, predicate):
+        """
+        Returns new ParallelEnumerable where elements matching predicate are
+        selected in parallel. predicate must be picklable
+        :param predicate: predicate as a function
+        :return: new ParallelEnumerable object
+        """
+        if predicate is None:
+            raise NullArgumentError(u"No predicate given for where clause")
+        return self._parallel(self._query.then(u'where', predicate))
+
+    def select_many(self, func=lambda x: x):
+        """
+        Flattens an iterable of iterables in parallel. func must be picklable
+        :param func: selector as function
+        :return: new ParallelEnumerable object
+        """
+        return self._parallel(self._query.then(u'select_many', func))
+
+    def as_ordered(self):
+        """
+        Returns new ParallelEnumerable whose results keep the order of the
+        data
+        :return: new ParallelEnumerable object
+        """
+        return self._parallel(self._query.with_order(True))
+
+    def as_unordered(self):
+        """
+        Returns new ParallelEnumerable that yields the results of each chunk
+        as soon as it is done, in any order
+        :return: new ParallelEnumerable object
+        """
+        return self._parallel(self._query.with_order(False))
+
+    def count(self):
+        """
+        Returns the number of elements, counted in parallel per chunk
+        :return: integer object
+        """
+        return self._query.count()
+
+    def sum(self, func=_identity):
+        """
+        Returns the sum of the elements. Partial sums are computed in parallel
+        per chunk. func must be picklable
+        :param func: function to transform data
+        :return: sum of selected elements
+        """
+        return self._query.sum(func)
+
+    def min(self, func=_identity):
+        """
+        Returns the min value of the elements, computed in parallel per chunk.
+        func must be picklable
+            * Raises NoElementsError if there are no elements
+        :param func: function to transform data
+        :return: min value
+        """
+        return self._query.extreme(func, False)
+
+    def max(self, func=_identity):
+        """
+        Returns the max value of the elements, computed in parallel per chunk.
+        func must be picklable
+            * Raises NoElementsError if there are no elements
+        :param func: function to transform data
+        :return: max value
+        """
+        return self._query.extreme(func, True)
+
+    def aggregate(self, func, seed=None, combine=None):
+        """
+        Perform a calculation over the elements. When a combine function is
+        given, every chunk is folded in parallel with func starting from a
+        copy of seed, or from its first element if seed is None, and the
+        partial results are merged with combine. combine must be associative
+        and seed an identity of combine for the result to equal a sequential
+        fold, e.g. aggregate(operator.add, 0, operator.add). Without combine
+        the elements are folded sequentially in the calling process.
+        func and seed must be picklable
+            * Raises NoElementsError if there are no elements
+        :param func: function of (aggregate result, next element)
+        :param seed: initial value of the calculation or None
+        :param combine: function of (aggregate result, partial result)
+        :return: result of the calculation
+        """
+        if combine is None:
+            return super(ParallelEnumerable3, self).aggregate(func, seed)
+        return self._query.aggregate(func, seed, combine)
+
+    def group_by(
+            self,
+            key_names=[],
+            key=_identity,
+            result_func=lambda x: x,
+            ordered_keys=False
+    ):
+        """
+        Groups the elements on given key selector in parallel. Every chunk is
+        grouped into its own hash table in a worker and the tables are merged
+        in the calling process. key must be picklable, result_func is applied
+        sequentially to the groups.
+        :param key_names: list of key names
+        :param key: key selector as function
+        :param result_func: lambda function to transform the groupings
+        :param ordered_keys: True to return groups sorted by key
+        :return: Enumerable of grouping objects
+        """
+        items = self._query.group(key).items()
+        if ordered_keys:
+            items = sorted(items, key=lambda item: item[0])
+        return self._derive([
+            Grouping3(_key_object(k, key_names), elements)
+            for k, elements in items
+        ]).select(result_func)
+
+    def as_sequential(self):
+        """
+        Returns new Enumerable over the results, on which every operator runs
+        sequentially in the calling process
+        :return: new Enumerable object
+        """
+        return self._derive(self)
+
+
+class NumericEnumerable3(Enumerable3):
+    def __init__(self, data=[], cache_policy=u'passthrough', dtype=None):
+        """
+        Enumerable over a one dimensional NumPy array of numbers. count, sum,
+        min, max, avg, median and stats run as NumPy kernels. select, where,
+        any and all call their function once with the whole array, so
+        arithmetic and comparisons such as lambda x: x * 2 or lambda x: x > 0
+        run vectorized as well. Functions that cannot be applied to an array
+        fall back to the per element operators of Enumerable, so functions
+        should not have side effects. select and where are evaluated when
+        they are called and return new NumericEnumerables. Iterating yields
+        Python numbers. Enumerable(array) returns a NumericEnumerable for one
+        dimensional numeric arrays
+            * Raises ImportError if NumPy is not installed
+        :param data: NumPy array or iterable of numbers. Arrays are not copied
+        :param cache_policy: cache policy of Enumerables derived by the per
+        element operators
+        :param dtype: NumPy dtype of the array, inferred from data if None
+        :return: void
+        """
+        if isinstance(data, NumericEnumerable3):
+            data = data.data
+        super(NumericEnumerable3, self).__init__(
+            to_array(data, dtype), cache_policy)
+
+    def _numeric(self, array):
+        return NumericEnumerable3(array, self._cache_policy)
+
+    def _values(self, func):
+        """
+        Returns func applied to every element as an array, or None if func
+        cannot be vectorized
+        """
+        if func is _identity:
+            return self._data
+        return vectorize(func, self._data)
+
+    def __iter__(self):
+        return iterate(self._data)
+
+    def to_list(self):
+        """
+        Converts the array into a list of Python numbers
+        :return: list object
+        """
+        return self._data.tolist()
+
+    def count(self):
+        """
+        Returns the number of elements
+        :return: integer object
+        """
+        return len(self._data)
+
+    def select(self, func=_identity):
+        """
+        Transforms the elements. Vectorizable functions return a new
+        NumericEnumerable, other functions an Enumerable
+        :param func: lambda expression on how to perform transformation
+        :return: new NumericEnumerable or Enumerable object
+        """
+        values = self._values(func)
+        if values is None:
+            return super(NumericEnumerable3, self).select(func)
+        return self._numeric(values)
+
+    def where(self, predicate):
+        """
+        Returns the elements matching predicate. A vectorizable predicate is
+        evaluated as a boolean mask over the array and returns a new
+        NumericEnumerable, other predicates an Enumerable
+        :param predicate: predicate as a lambda expression
+        :return: new NumericEnumerable or Enumerable object
+        """
+        if predicate is None:
+            raise NullArgumentError(u"No predicate given for where clause")
+        mask = self._values(predicate)
+        if mask is None:
+            return super(NumericEnumerable3, self).where(predicate)
+        return self._numeric(self._data[mask.astype(bool)])
+
+    def any(self, predicate):
+        """
+        Returns true if any elements satisfy predicate
+        :param predicate: condition to satisfy as lambda expression
+        :return: boolean True or False
+        """
+        if predicate is None:
+            raise NullArgumentError(
+                u"predicate lambda expression is necessary")
+        mask = self._values(predicate)
+        if mask is None:
+            return super(NumericEnumerable3, self).any(predicate)
+        return bool(mask.any())
+
+    def all(self, predicate):
+        """
+        Determines whether all elements satisfy predicate
+        :param predicate: the condition to test each element as lambda function
+        :return: boolean True or False
+        """
+        if predicate is None:
+            raise NullArgumentError(
+                u"predicate lambda expression is necessary")
+        mask = self._values(predicate)
+        if mask is None:
+            return super(NumericEnumerable3, self).all(predicate)
+        return bool(mask.all())
+
+    def sum(self, func=_identity):
+        """
+        Returns the sum of the elements
+        :param func: lambda expression to transform data
+        :return: sum of selected elements
+        """
+        values = self._values(func)
+        if values is None:
+            return super(NumericEnumerable3, self).sum(func)
+        return array_sum(values)
+
+    def min(self, func=_identity):
+        """
+        Returns the min value of the elements
+            * Raises NoElementsError if there are no elements
+        :param func: lambda expression to transform data
+        :return: minimum value
+        """
+        values = self._values(func)
+        if values is None:
+            return super(NumericEnumerable3, self).min(func)
+        if len(values) == 0:
+            raise NoElementsError(u"Iterable contains no elements")
+        return values.min().item()
+
+    def max(self, func=_identity):
+        """
+        Returns the max value of the elements
+            * Raises NoElementsError if there are no elements
+        :param func: lambda expression to transform data
+        :return: maximum value
+        """
+        values = self._values(func)
+        if values is None:
+            return super(NumericEnumerable3, self).max(func)
+        if len(values) == 0:
+            raise NoElementsError(u"Iterable contains no elements")
+        return values.max().item()
+
+    def avg(self, func=_identity):
+        """
+        Returns the average value of the elements
+            * Raises NoElementsError if there are no elements
+        :param func: lambda expression to transform data
+        :return: average value as float object
+        """
+        values = self._values(func)
+        if values is None:
+            return super(NumericEnumerable3, self).avg(func)
+        if len(values) == 0:
+            raise NoElementsError(u"Iterable contains no elements")
+        return float(values.mean())
+
+    def median(self, func=_identity):
+        """
+        Returns the median value of the elements
+            * Raises NoElementsError if there are no elements
+        :param func: lambda expression to transform data
+        :return: median value
+        """
+        values = self._values(func)
+        if values is None:
+            return super(NumericEnumerable3, self).median(func)
+        if len(values) == 0:
+            raise NoElementsError(u"Iterable contains no elements")
+        return array_median(values)
+
+    def stats(self, func=_identity, variance=False):
+        """
+        Returns count, sum, min, max and mean of the elements
+            * Raises NoElementsError if there are no elements
+        :param func: lambda expression to transform data
+        :param variance: True to also compute the population variance
+        :return: Statistics object
+        """
+        values = self._values(func)
+        if values is None:
+            return super(NumericEnumerable3, self).stats(func, variance)
+        if len(values) == 0:
+            raise NoElementsError(u"Iterable contains no elements")
+        return Statistics(
+            len(values),
+            array_sum(values),
+            values.min().item(),
+            values.max().item(),
+            float(values.var()) if variance else None
+        )
+
+
 class SortedEnumerable3(Enumerable3):
-    def __init__(self, key_funcs, data):
+    def __init__(self, key_funcs, data, cache_policy=u'passthrough'):
         """
         Constructor
         :param key_funcs: list of OrderingDirection instances in order of
         primary key
         --> less important keys
         :param data: data as iterable
+        :param cache_policy: cache policy of the Enumerable. Unless it is
+        'none' the data is sorted once and the sorted list is reused
         """
         if key_funcs is None:
             raise NullArgumentError(u"key_funcs argument cannot be None")
         if not isinstance(key_funcs, list):
             raise TypeError(u"key_funcs should be a list instance")
-        self._key_funcs = [
+        self._key_funcs = tuple(
             f for f in key_funcs if isinstance(f, OrderingDirection)
-        ]
-        super(SortedEnumerable3, self).__init__(data)
+        )
+        self._sorted = None
+        super(SortedEnumerable3, self).__init__(data, cache_policy)
+
+    def _sequence(self):
+        # the data is only in sorted order after it has been sorted
+        return self._sorted
+
+    def plan(self):
+        """
+        Returns the logical plan of the sort and the operators leading to it
+        :return: py_linq.plan.Node object
+        """
+        if self._sorted is not None:
+            return Source(self)
+        child = self._data.plan() if isinstance(self._data, Enumerable3) \
+            else Source(Enumerable3(self._data, self._cache_policy))
+        return OrderBy(self._key_funcs, child)
+
+    def _sort(self):
+        """
+        Sorts the data on the whole key chain in a single stable sort
+        :return: sorted list
+        """
+        if self._sorted is not None:
+            return self._sorted
+        key, reverse = _sort_key(self._key_funcs)
+        result = sorted(self._data, key=key, reverse=reverse)
+        if self._cache_policy != u'none':
+            self._sorted = result
+        return result
 
     def __iter__(self):
-        for o in reversed(self._key_funcs):
-            self._data = sorted(self._data, key=o.key,
-                                reverse=o.descending)
-        cache = []
-        for d in self._data:
-            cache.append(d)
+        for d in self._sort():
             yield d
-        self._data = cache
+
+    def _head(self, n):
+        """
+        Returns the first n elements in sorted order. Unless the data has
+        already been sorted, a bounded heap selection is used which costs
+        O(n log k) time and O(k) memory and keeps the stability of the sort
+        :param n: number of elements
+        :return: list object
+        """
+        if n <= 0:
+            return []
+        if self._sorted is not None:
+            return self._sorted[:n]
+        key, reverse = _sort_key(self._key_funcs)
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        return select(n, self._data, key=key)
+
+    def take(self, n):
+        """
+        Return new Enumerable where first n elements are taken. Only the n
+        smallest elements are selected instead of sorting all of them
+        :param n: Number of elements to take
+        :return: new Enumerable object
+        """
+        return self._derive(_SortedHead(self, n))
+
+    def first(self):
+        """
+        Returns the first element without sorting all elements
+        :return: data element as object or NoElementsError if transformed data
+        contains no elements
+        """
+        return self.element_at(0)
+
+    def element_at(self, n):
+        """
+        Returns element at given index without sorting all elements
+            * Raises NoElementsError if no element found at specified position
+        :param n: index as int object
+        :return: Element at given index
+        """
+        head = self._head(n + 1)
+        if n < 0 or len(head) <= n:
+            raise NoElementsError(u"No element found at index {0}".format(n))
+        return head[n]
 
     def then_by(self, func):
         """
@@ -677,8 +2217,10 @@ class SortedEnumerable3(Enumerable3):
         if func is None:
             raise NullArgumentError(
                 u"then by requires a lambda function arg")
-        self._key_funcs.append(OrderingDirection(key=func, reverse=False))
-        return SortedEnumerable3(self._key_funcs, self._data)
+        return SortedEnumerable3(
+            list(self._key_funcs) + [OrderingDirection(key=func, reverse=False)],
+            self._data,
+            self._cache_policy)
 
     def then_by_descending(self, func):
         """
@@ -689,5 +2231,7 @@ class SortedEnumerable3(Enumerable3):
         if func is None:
             raise NullArgumentError(
                 u"then_by_descending requires a lambda function arg")
-        self._key_funcs.append(OrderingDirection(key=func, reverse=True))
-        return SortedEnumerable3(self._key_funcs, self._data)
+        return SortedEnumerable3(
+            list(self._key_funcs) + [OrderingDirection(key=func, reverse=True)],
+            self._data,
+            self._cache_policy)
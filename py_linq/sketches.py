@@ -0,0 +1,364 @@
+import hashlib
+import itertools
+import math
+from .exceptions import NoElementsError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _splitmix64(x):
+    """
+    Finalizer of the splitmix64 generator, used to spread 64 bit integers
+    """
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def _hash64(key):
+    """
+    64 bit hash of a key that is stable across processes, so that sketches
+    built in different interpreters can be merged. Integers (and integral
+    floats) that fit in 64 bits are mixed with splitmix64 so that they hash
+    the same on the NumPy path, everything else is hashed with the first
+    8 bytes of sha256, which every supported interpreter provides
+    """
+    if isinstance(key, float) and key.is_integer():
+        key = int(key)
+    if isinstance(key, int) and -(1 << 63) <= key < (1 << 64):
+        return _splitmix64(key & _MASK64)
+    if isinstance(key, bytes):
+        data = key
+    elif isinstance(key, str):
+        data = key.encode('utf-8')
+    else:
+        data = repr(key).encode('utf-8')
+    return int.from_bytes(
+        hashlib.sha256(data).digest()[:8], 'little')
+
+
+class TDigest(object):
+    def __init__(self, compression=100):
+        """
+        Mergeable sketch for approximate quantiles (merging t-digest). Values
+        are buffered and periodically merged into a bounded number of
+        weighted centroids. Centroids near the tails are kept small with the
+        arcsine scale function, so extreme quantiles are more accurate than
+        the median.
+
+        Memory is O(compression). For a given compression the rank error of a
+        quantile estimate q is roughly bounded by
+        pi * sqrt(q * (1 - q)) / compression, i.e. about 1.6% of the number of
+        values at the median and much less at the tails for the default
+        compression of 100.
+        :param compression: accuracy parameter, larger is more accurate
+        :return: void
+        """
+        if compression <= 0:
+            raise ValueError(u"compression must be greater than 0")
+        self.compression = float(compression)
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._means = []
+        self._weights = []
+        self._buffer = []
+        self._buffer_size = max(int(compression) * 5, 50)
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return {
+            'compression': self.compression,
+            'count': self.count,
+            'centroids': len(self.centroids()),
+        }.__repr__()
+
+    def add(self, value, weight=1):
+        """
+        Adds a value to the sketch
+        :param value: numeric value
+        :param weight: number of times the value occurs
+        :return: void
+        """
+        if weight <= 0:
+            raise ValueError(u"weight must be greater than 0")
+        if self.count == 0:
+            self.min = self.max = value
+        elif value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+        self.count += weight
+        self._buffer.append((value, weight))
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def update(self, values):
+        """
+        Adds every value of an iterable to the sketch
+        :param values: iterable of numeric values
+        :return: void
+        """
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        """
+        Returns a new sketch that summarizes the values of both sketches. Used
+        to combine sketches built over separate partitions of the data
+        :param other: TDigest instance
+        :return: new TDigest instance
+        """
+        if not isinstance(other, TDigest):
+            raise TypeError(u"other must be a TDigest instance")
+        result = TDigest(max(self.compression, other.compression))
+        for digest in [self, other]:
+            for mean, weight in digest.centroids():
+                result.add(mean, weight)
+            if digest.count > 0:
+                result.min = digest.min if result.min is None \
+                    else min(result.min, digest.min)
+                result.max = digest.max if result.max is None \
+                    else max(result.max, digest.max)
+        result._compress()
+        return result
+
+    def centroids(self):
+        """
+        Returns the centroids of the sketch
+        :return: list of (mean, weight) tuples in ascending order of mean
+        """
+        self._compress()
+        return list(zip(self._means, self._weights))
+
+    def _q_limit(self, q):
+        """
+        Largest cumulative quantile a centroid starting at q may reach, found
+        by moving one unit along the arcsine scale function
+        """
+        k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        items = sorted(
+            list(zip(self._means, self._weights)) + self._buffer,
+            key=lambda c: c[0])
+        self._buffer = []
+        total = float(self.count)
+        means = []
+        weights = []
+        mean, weight = items[0]
+        mean = float(mean)
+        cumulative = 0.0
+        limit = self._q_limit(0.0)
+        for m, w in items[1:]:
+            if (cumulative + weight + w) / total <= limit:
+                weight += w
+                mean += (m - mean) * w / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                cumulative += weight
+                limit = self._q_limit(cumulative / total)
+                mean, weight = float(m), w
+        means.append(mean)
+        weights.append(weight)
+        self._means = means
+        self._weights = weights
+
+    def quantile(self, q):
+        """
+        Returns the approximate q-th quantile of the values in the sketch
+            * Raises NoElementsError if the sketch is empty
+            * Raises ValueError if q is not between 0 and 1
+        :param q: quantile between 0 and 1
+        :return: approximate quantile value
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(u"quantile must be between 0 and 1")
+        if self.count == 0:
+            raise NoElementsError(u"Sketch contains no elements")
+        self._compress()
+        means = self._means
+        weights = self._weights
+        if len(means) == 1:
+            return means[0]
+        position = q * self.count
+        if position < weights[0] / 2.0:
+            if weights[0] == 1:
+                return self.min
+            return self.min + (means[0] - self.min) * position / (weights[0] / 2.0)
+        if position > self.count - weights[-1] / 2.0:
+            if weights[-1] == 1:
+                return self.max
+            remaining = self.count - position
+            return self.max - (self.max - means[-1]) * remaining / (weights[-1] / 2.0)
+        cumulative = weights[0] / 2.0
+        for i in range(len(means) - 1):
+            step = (weights[i] + weights[i + 1]) / 2.0
+            if cumulative + step >= position:
+                if weights[i] == 1 and position - cumulative < 0.5:
+                    return means[i]
+                if weights[i + 1] == 1 and cumulative + step - position <= 0.5:
+                    return means[i + 1]
+                fraction = (position - cumulative) / step
+                return means[i] + fraction * (means[i + 1] - means[i])
+            cumulative += step
+        return means[-1]
+
+
+class HyperLogLog(object):
+    def __init__(self, precision=14):
+        """
+        Mergeable sketch for approximate distinct counting. Uses 2**precision
+        one byte registers, i.e. 16 KB for the default precision of 14. The
+        standard error of the estimate is about 1.04 / sqrt(2**precision),
+        0.8% for the default precision.
+        :param precision: number of index bits between 4 and 18
+        :return: void
+        """
+        if not 4 <= precision <= 18:
+            raise ValueError(u"precision must be between 4 and 18")
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+
+    def __repr__(self):
+        return {
+            'precision': self.precision,
+            'count': self.count(),
+        }.__repr__()
+
+    def add(self, key):
+        """
+        Adds a key to the sketch
+        :param key: the key to count
+        :return: void
+        """
+        self._add_hash(_hash64(key))
+
+    def _add_hash(self, h):
+        width = 64 - self.precision
+        i = h >> width
+        rank = width - (h & ((1 << width) - 1)).bit_length() + 1
+        if rank > self._registers[i]:
+            self._registers[i] = rank
+
+    def update(self, keys, use_numpy=None, chunk_size=65536):
+        """
+        Adds every key of an iterable to the sketch. When NumPy is available,
+        chunks of integer keys are hashed with vectorized kernels that
+        produce the same registers as the pure Python path
+        :param keys: iterable of keys
+        :param use_numpy: True to require NumPy, False to never use it and None
+        to use it when it is installed
+        :param chunk_size: number of keys hashed per vectorized call
+        :return: void
+        """
+        if use_numpy and numpy is None:
+            raise ImportError(u"NumPy is required for use_numpy=True")
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        if not use_numpy:
+            for key in keys:
+                self._add_hash(_hash64(key))
+            return
+        iterator = iter(keys)
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if not chunk:
+                return
+            hashes = _numpy_hash64(chunk)
+            if hashes is None:
+                for key in chunk:
+                    self._add_hash(_hash64(key))
+            else:
+                self._add_hashes(hashes)
+
+    def _add_hashes(self, hashes):
+        width = 64 - self.precision
+        index = (hashes >> numpy.uint64(width)).astype(numpy.intp)
+        remainder = hashes & numpy.uint64((1 << width) - 1)
+        ranks = (width + 1 - _numpy_bit_length(remainder)).astype(numpy.uint8)
+        registers = numpy.zeros(len(self._registers), dtype=numpy.uint8)
+        numpy.maximum.at(registers, index, ranks)
+        current = numpy.frombuffer(self._registers, dtype=numpy.uint8)
+        self._registers = bytearray(numpy.maximum(current, registers).tobytes())
+
+    def merge(self, other):
+        """
+        Returns a new sketch that counts the keys of both sketches. Used to
+        combine sketches built over separate partitions of the data
+        :param other: HyperLogLog instance with the same precision
+        :return: new HyperLogLog instance
+        """
+        if not isinstance(other, HyperLogLog):
+            raise TypeError(u"other must be a HyperLogLog instance")
+        if other.precision != self.precision:
+            raise ValueError(u"sketches must have the same precision")
+        result = HyperLogLog(self.precision)
+        result._registers = bytearray(
+            max(a, b) for a, b in zip(self._registers, other._registers))
+        return result
+
+    def count(self):
+        """
+        Returns the estimated number of distinct keys added to the sketch
+        :return: integer object
+        """
+        m = len(self._registers)
+        if m == 16:
+            alpha = 0.673
+        elif m == 32:
+            alpha = 0.697
+        elif m == 64:
+            alpha = 0.709
+        else:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self._registers)
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * math.log(float(m) / zeros)
+        return int(round(estimate))
+
+
+def _numpy_hash64(keys):
+    """
+    Vectorized _hash64 for a list of integer keys
+    :return: uint64 array or None if the keys are not all 64 bit integers
+    """
+    if not all(type(k) is int for k in keys):
+        return None
+    try:
+        values = numpy.array(keys, dtype=numpy.int64).view(numpy.uint64)
+    except OverflowError:
+        return None
+    with numpy.errstate(over='ignore'):
+        x = values + numpy.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> numpy.uint64(30))) * numpy.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> numpy.uint64(27))) * numpy.uint64(0x94D049BB133111EB)
+        return x ^ (x >> numpy.uint64(31))
+
+
+def _numpy_bit_length(values):
+    """
+    Vectorized int.bit_length for uint64 arrays
+    """
+    length = numpy.zeros(len(values), dtype=numpy.int64)
+    for shift in [32, 16, 8, 4, 2, 1]:
+        wide = values >= numpy.uint64(1 << shift)
+        values = numpy.where(wide, values >> numpy.uint64(shift), values)
+        length += numpy.where(wide, shift, 0)
+    return length + (values > 0)
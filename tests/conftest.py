@@ -0,0 +1,4 @@
+import sys
+
+# async generators are a syntax error before Python 3.6
+collect_ignore = [] if sys.version_info >= (3, 6) else ['test_async.py']
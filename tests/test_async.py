@@ -0,0 +1,180 @@
+import asyncio
+import functools
+from unittest import TestCase
+from py_linq import AsyncEnumerable, Enumerable
+from py_linq.exceptions import NoElementsError, NullArgumentError
+from tests import _locations
+
+
+async def numbers(n):
+    for i in range(n):
+        await asyncio.sleep(0)
+        yield i
+
+
+async def double(x):
+    await asyncio.sleep(0)
+    return x * 2
+
+
+async def is_even(x):
+    await asyncio.sleep(0)
+    return x % 2 == 0
+
+
+def run(test):
+    """
+    Runs an async test method to completion on a new event loop
+    """
+    @functools.wraps(test)
+    def wrapper(self):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(test(self))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
+    return wrapper
+
+
+class TestAsyncEnumerable(TestCase):
+    def test_constructor(self):
+        self.assertRaises(TypeError, AsyncEnumerable, 1)
+        self.assertRaises(NullArgumentError, AsyncEnumerable([]).where, None)
+        self.assertRaises(
+            ValueError, AsyncEnumerable([]).select_async, double, concurrency=0)
+
+    @run
+    async def test_async_for(self):
+        result = []
+        async for element in AsyncEnumerable(numbers(3)):
+            result.append(element)
+        self.assertListEqual(result, [0, 1, 2])
+        self.assertListEqual(await AsyncEnumerable([4, 5]).to_list(), [4, 5])
+
+    @run
+    async def test_operators(self):
+        query = AsyncEnumerable(numbers(20)).where(is_even).select(double) \
+            .skip(1).take(4)
+        self.assertListEqual(await query.to_list(), [4, 8, 12, 16])
+        query = AsyncEnumerable(range(10)).where(lambda x: x > 2) \
+            .select(lambda x: x * 10).take_while(lambda x: x < 80) \
+            .skip_while(is_even)
+        self.assertListEqual(await query.to_list(), [])
+        query = AsyncEnumerable([[1, 2], [2, 3]]).select_many() \
+            .distinct().concat([9]).concat(numbers(1))
+        self.assertListEqual(await query.to_list(), [1, 2, 3, 9, 0])
+        query = AsyncEnumerable(range(3)).select_many(
+            lambda x: numbers(x))
+        self.assertListEqual(await query.to_list(), [0, 0, 1])
+
+    @run
+    async def test_reenumerable(self):
+        query = AsyncEnumerable(range(5)).select(double)
+        self.assertListEqual(await query.to_list(), [0, 2, 4, 6, 8])
+        self.assertListEqual(await query.to_list(), [0, 2, 4, 6, 8])
+
+    @run
+    async def test_order_and_group(self):
+        query = AsyncEnumerable(_locations).order_by_descending(
+            lambda x: x[3]).select(lambda x: x[3]).take(2)
+        self.assertListEqual(await query.to_list(), [90000, 80000])
+        self.assertListEqual(
+            await AsyncEnumerable([3, 1, 2]).order_by(double).to_list(),
+            [1, 2, 3])
+        groups = AsyncEnumerable(_locations).group_by(
+            key_names=['country'], key=lambda x: x[0],
+            result_func=lambda g: (g.key.country, g.count()))
+        expected = Enumerable(_locations).group_by(
+            key_names=['country'], key=lambda x: x[0],
+            result_func=lambda g: (g.key.country, g.count())).to_list()
+        self.assertListEqual(await groups.to_list(), expected)
+
+    @run
+    async def test_terminal_operators(self):
+        values = AsyncEnumerable(numbers(5))
+        self.assertEqual(await AsyncEnumerable(numbers(5)).count(), 5)
+        self.assertEqual(await values.sum(double), 20)
+        self.assertEqual(await AsyncEnumerable([3, 1, 2]).min(), 1)
+        self.assertEqual(await AsyncEnumerable([3, 1, 2]).max(double), 6)
+        self.assertEqual(await AsyncEnumerable([1, 2]).avg(), 1.5)
+        self.assertEqual(await AsyncEnumerable([1, 2]).first(), 1)
+        self.assertEqual(await AsyncEnumerable([1, 2]).last(), 2)
+        self.assertEqual(await AsyncEnumerable([1, 2]).element_at(1), 2)
+        self.assertIsNone(await AsyncEnumerable([]).first_or_default())
+        self.assertTrue(await AsyncEnumerable([1, 2]).any(is_even))
+        self.assertFalse(await AsyncEnumerable([1, 2]).all(is_even))
+        self.assertTrue(await AsyncEnumerable([1, 2]).contains(2, double))
+        self.assertFalse(await AsyncEnumerable([1, 2]).contains(4, double))
+        self.assertEqual(
+            await AsyncEnumerable([1, 2, 3]).aggregate(lambda a, b: a * b), 6)
+        enumerable = await AsyncEnumerable(numbers(3)).to_enumerable()
+        self.assertListEqual(enumerable.select(str).to_list(), ['0', '1', '2'])
+        for empty in [
+            AsyncEnumerable([]).min(),
+            AsyncEnumerable([]).avg(),
+            AsyncEnumerable([]).first(),
+            AsyncEnumerable([]).last(),
+            AsyncEnumerable([]).element_at(0),
+            AsyncEnumerable([]).aggregate(lambda a, b: a, 0),
+        ]:
+            with self.assertRaises(NoElementsError):
+                await empty
+
+    @run
+    async def test_select_async_concurrency(self):
+        state = {'running': 0, 'peak': 0}
+
+        async def fetch(x):
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+            await asyncio.sleep(0.01)
+            state['running'] -= 1
+            return x + 100
+
+        result = await AsyncEnumerable(numbers(20)).select_async(
+            fetch, concurrency=4).to_list()
+        self.assertListEqual(result, list(range(100, 120)))
+        self.assertEqual(state['peak'], 4)
+
+    @run
+    async def test_select_async_backpressure(self):
+        read = []
+
+        async def source():
+            i = 0
+            while True:
+                read.append(i)
+                yield i
+                i += 1
+
+        result = await AsyncEnumerable(source()).select_async(
+            double, concurrency=3).take(5).to_list()
+        self.assertListEqual(result, [0, 2, 4, 6, 8])
+        self.assertLessEqual(len(read), 5 + 3)
+
+    @run
+    async def test_select_async_unordered(self):
+        async def slow_first(x):
+            await asyncio.sleep(0.05 if x == 0 else 0)
+            return x
+
+        result = await AsyncEnumerable(range(4)).select_async(
+            slow_first, concurrency=4, ordered=False).to_list()
+        self.assertListEqual(sorted(result), [0, 1, 2, 3])
+        self.assertEqual(result[-1], 0)
+
+    @run
+    async def test_select_async_exceptions(self):
+        async def fail_on_two(x):
+            if x == 2:
+                raise ValueError(u"two")
+            return x
+
+        result = await AsyncEnumerable(range(4)).select_async(
+            fail_on_two, concurrency=2, return_exceptions=True).to_list()
+        self.assertListEqual(result[:2], [0, 1])
+        self.assertIsInstance(result[2], ValueError)
+        self.assertEqual(result[3], 3)
+        with self.assertRaises(ValueError):
+            await AsyncEnumerable(range(4)).select_async(fail_on_two).to_list()
@@ -1,8 +1,11 @@
+import collections
+import itertools
+import random
 from unittest import TestCase
 from py_linq import Enumerable
 from tests import _empty, _simple, _complex, _locations
 from py_linq.exceptions import NoElementsError, NullArgumentError, \
-    NoMatchingElement, MoreThanOneMatchingElement
+    NoMatchingElement, MoreThanOneMatchingElement, DuplicateKeyError
 
 
 class TestFunctions(TestCase):
@@ -11,6 +14,70 @@ class TestFunctions(TestCase):
         self.simple = Enumerable(_simple)
         self.complex = Enumerable(_complex)
 
+    def test_cache_policy(self):
+        self.assertRaises(ValueError, Enumerable, [], 'always')
+
+        data = [1, 2, 3]
+        passthrough = Enumerable(data)
+        self.assertEqual(passthrough.cache_policy, 'passthrough')
+        self.assertListEqual(passthrough.to_list(), data)
+        self.assertListEqual(passthrough.to_list(), data)
+        self.assertIs(
+            passthrough.data,
+            data,
+            u"Passthrough should not copy list data")
+
+        lazy = Enumerable(data, cache_policy='lazy')
+        self.assertListEqual(lazy.to_list(), data)
+        self.assertIsNot(lazy.data, data, u"Lazy should memoize list data")
+        memoized = lazy.data
+        self.assertListEqual(lazy.to_list(), data)
+        self.assertIs(lazy.data, memoized, u"Lazy should memoize only once")
+
+        pulled = []
+
+        def source():
+            for x in range(5):
+                pulled.append(x)
+                yield x
+
+        shared = Enumerable(source(), cache_policy='lazy')
+        first, second = iter(shared), iter(shared)
+        self.assertListEqual(
+            [next(first), next(first), next(second), next(first)],
+            [0, 1, 0, 2],
+            u"Concurrent iterators should share memoized elements")
+        self.assertListEqual(list(second), [1, 2, 3, 4])
+        self.assertListEqual(list(first), [3, 4])
+        self.assertListEqual(shared.to_list(), [0, 1, 2, 3, 4])
+        self.assertListEqual(pulled, [0, 1, 2, 3, 4], u"Source read once")
+
+        streaming = Enumerable(source(), cache_policy='none')
+        self.assertEqual(streaming.select(lambda x: x * 2).sum(), 20)
+        self.assertListEqual(
+            streaming.to_list(),
+            [],
+            u"Uncached generator should only be enumerated once")
+        self.assertEqual(
+            streaming.where(lambda x: x).select(lambda x: x).cache_policy,
+            'none',
+            u"Derived enumerables should inherit the cache policy")
+        self.assertEqual(
+            Enumerable(data, cache_policy='none').order_by(lambda x: -x)
+            .cache_policy,
+            'none')
+        self.assertListEqual(
+            Enumerable(source(), cache_policy='none')
+            .with_cache_policy('lazy').select(lambda x: x).to_list(),
+            [0, 1, 2, 3, 4])
+        one_shot = Enumerable(iter([1, 2, 3]))
+        self.assertListEqual(
+            one_shot.with_cache_policy('lazy').to_list(), [1, 2, 3])
+        self.assertListEqual(
+            one_shot.to_list(),
+            [1, 2, 3],
+            u"with_cache_policy should read data through the memo of self")
+
     def test_to_list(self):
         self.assertListEqual(
             self.empty.to_list(),
@@ -25,6 +92,44 @@ class TestFunctions(TestCase):
             _complex,
             u"Complex to_list not correct")
 
+    def test_to_set(self):
+        self.assertSetEqual(self.empty.to_set(), set())
+        self.assertSetEqual(
+            self.simple.concat(self.simple).to_set(),
+            set(_simple))
+
+    def test_to_dictionary(self):
+        self.assertDictEqual(
+            self.complex.to_dictionary(lambda x: x['value']),
+            {1: {'value': 1}, 2: {'value': 2}, 3: {'value': 3}})
+        self.assertDictEqual(
+            self.simple.to_dictionary(value_func=lambda x: x * 10),
+            {1: 10, 2: 20, 3: 30})
+        self.assertRaises(
+            DuplicateKeyError,
+            Enumerable(_locations).to_dictionary,
+            lambda x: x[0])
+
+    def test_to_lookup(self):
+        lookup = Enumerable(_locations).to_lookup(
+            key=lambda x: x[0],
+            element_func=lambda x: x[3],
+            key_names=['country'])
+        self.assertEqual(lookup.count(), 3)
+        self.assertEqual(len(lookup), 3)
+        self.assertEqual(lookup['England'].sum(), 390300)
+        self.assertListEqual(lookup['Wales'].to_list(), [29700, 30000, 12800])
+        self.assertListEqual(lookup['Ireland'].to_list(), [])
+        self.assertTrue(lookup.contains_key('Scotland'))
+        self.assertFalse(lookup.contains_key('Ireland'))
+        self.assertTrue('Wales' in lookup)
+        self.assertListEqual(
+            lookup.select(lambda g: (g.key.country, g.count())).to_list(),
+            [('Scotland', 3), ('Wales', 3), ('England', 7)],
+            u"Lookup should iterate groupings in order of first key occurrence")
+        cities = Enumerable(_locations).to_lookup(lambda x: [x[0], x[1]])
+        self.assertEqual(cities[['England', 'London']].count(), 3)
+
     def test_sum(self):
         self.assertEqual(
             self.empty.sum(),
@@ -214,6 +319,33 @@ class TestFunctions(TestCase):
             ).order_by(lambda x: x).to_list(),
             u"Projection and sort ascending of complex should yield simple")
 
+    def test_stats(self):
+        self.assertRaises(NoElementsError, self.empty.stats)
+        stats = self.complex.stats(lambda x: x['value'], variance=True)
+        self.assertEqual(stats.count, 3)
+        self.assertEqual(stats.sum, 6)
+        self.assertEqual(stats.min, 1)
+        self.assertEqual(stats.max, 3)
+        self.assertEqual(stats.mean, 2.0)
+        self.assertAlmostEqual(stats.variance, 2.0 / 3.0)
+        self.assertIsNone(
+            self.simple.stats().variance,
+            u"Variance should only be computed when requested")
+
+        calls = []
+
+        def value(x):
+            calls.append(x)
+            return x
+
+        for aggregate in ['sum', 'min', 'max', 'avg', 'stats']:
+            del calls[:]
+            getattr(Enumerable(x for x in _simple), aggregate)(value)
+            self.assertEqual(
+                len(calls),
+                len(_simple),
+                u"{0} should make a single pass".format(aggregate))
+
     def test_median(self):
         self.assertRaises(NoElementsError, self.empty.median)
 
@@ -227,6 +359,47 @@ class TestFunctions(TestCase):
             median,
             u"Median of complex enumerable should be {0:.5f}".format(median))
 
+    def test_median_selection(self):
+        rng = random.Random(42)
+        for length in [1, 2, 15, 16, 17, 100, 1001]:
+            values = [rng.randint(0, 50) for _ in range(length)]
+            ordered = sorted(values)
+            i = length // 2
+            median = ordered[i] if length % 2 == 1 \
+                else (ordered[i - 1] + ordered[i]) / 2.0
+            self.assertEqual(
+                Enumerable(values).median(),
+                median,
+                u"Median of {0} values is not correct".format(length))
+        self.assertEqual(
+            Enumerable(['Zeke', 'Alice', 'Bob']).median(),
+            'Bob',
+            u"Median of strings should be the middle string")
+
+    def test_quantile_percentiles(self):
+        self.assertRaises(NoElementsError, self.empty.quantile, 0.5)
+        self.assertRaises(ValueError, self.simple.quantile, 1.5)
+        self.assertRaises(ValueError, self.simple.percentiles, [-1])
+        self.assertEqual(self.simple.quantile(0), 1)
+        self.assertEqual(self.simple.quantile(1), 3)
+        self.assertEqual(self.simple.quantile(0.25), 1.5)
+        self.assertEqual(
+            self.complex.quantile(0.5, lambda x: x['value']),
+            2)
+
+        rng = random.Random(7)
+        values = [rng.random() for _ in range(1000)]
+        ordered = sorted(values)
+        percents = [99, 50, 0, 90, 100, 37.5]
+        expected = []
+        for p in percents:
+            h = (len(ordered) - 1) * p / 100.0
+            lo = int(h)
+            hi = min(lo + 1, len(ordered) - 1)
+            expected.append(ordered[lo] + (h - lo) * (ordered[hi] - ordered[lo]))
+        for actual, e in zip(Enumerable(values).percentiles(percents), expected):
+            self.assertAlmostEqual(actual, e)
+
     def test_skip_take(self):
         self.assertListEqual(
             self.empty.skip(2).to_list(),
@@ -428,6 +601,43 @@ class TestFunctions(TestCase):
             240000,
             u"Sum of London, England location does not equal")
 
+    def test_group_by_hash(self):
+        countries = Enumerable(_locations).group_by(
+            key_names=['country'],
+            key=lambda x: x[0])
+        self.assertListEqual(
+            countries.select(lambda g: g.key.country).to_list(),
+            ['Scotland', 'Wales', 'England'],
+            u"Groups should be in order of first key occurrence")
+        self.assertListEqual(
+            countries.select(lambda g: g.count()).to_list(),
+            [3, 3, 7],
+            u"Group sizes do not match")
+
+        ordered = Enumerable(_locations).group_by(
+            key_names=['country'],
+            key=lambda x: x[0],
+            ordered_keys=True)
+        self.assertListEqual(
+            ordered.select(lambda g: g.key.country).to_list(),
+            ['England', 'Scotland', 'Wales'],
+            u"Groups should be in ascending key order")
+
+        mixed = Enumerable([1, None, 2, None, 1]).group_by(
+            key_names=['id'],
+            result_func=lambda g: (g.key.id, g.count()))
+        self.assertListEqual(
+            mixed.to_list(),
+            [(1, 2), (None, 2), (2, 1)],
+            u"Grouping should not require sortable keys")
+
+        dicts = Enumerable([{'a': 1}, {'a': 2}, {'a': 1}]).group_by(
+            result_func=lambda g: g.count())
+        self.assertListEqual(
+            dicts.to_list(),
+            [2, 1],
+            u"Grouping should support unhashable keys")
+
     def test_distinct(self):
         self.assertListEqual(
             self.empty.distinct().to_list(),
@@ -445,11 +655,20 @@ class TestFunctions(TestCase):
         self.assertListEqual(
             locations.to_list(),
             [
-                ('England', 'London', 'Branch1', 90000),
                 ('Scotland', 'Edinburgh', 'Branch1', 20000),
-                ('Wales', 'Cardiff', 'Branch1', 29700)
+                ('Wales', 'Cardiff', 'Branch1', 29700),
+                ('England', 'London', 'Branch1', 90000)
             ],
             u"Distinct locations do not match")
+        self.assertListEqual(
+            Enumerable(itertools.count()).distinct(lambda x: x % 100)
+            .take(10).to_list(),
+            list(range(10)),
+            u"Distinct should stream over an infinite sequence")
+        self.assertListEqual(
+            Enumerable([[1], [2], [1], {'a': 1}, {'a': 1}]).distinct().to_list(),
+            [[1], [2], {'a': 1}],
+            u"Distinct should support unhashable keys")
 
     def test_default_if_empty(self):
         self.assertListEqual(
@@ -464,6 +683,15 @@ class TestFunctions(TestCase):
             self.complex.default_if_empty().to_list(),
             _complex,
             u"Should yield complex list")
+        self.assertListEqual(
+            Enumerable((x for x in _simple), cache_policy='none')
+            .default_if_empty().to_list(),
+            _simple,
+            u"Should read a generator in a single pass")
+        self.assertListEqual(
+            Enumerable((x for x in []), cache_policy='none')
+            .default_if_empty(0).to_list(),
+            [0])
 
     def test_any(self):
         self.assertRaises(NullArgumentError, self.simple.any, None)
@@ -480,6 +708,47 @@ class TestFunctions(TestCase):
             self.complex.any(lambda x: x['value'] >= 1),
             u"Complex enumerable does contain elements with value >= 1")
 
+    def test_short_circuit(self):
+        self.assertTrue(
+            Enumerable(itertools.count()).any(lambda x: x > 10),
+            u"any should stop at the first match")
+        self.assertFalse(
+            Enumerable(itertools.count()).all(lambda x: x < 10),
+            u"all should stop at the first miss")
+        self.assertTrue(
+            Enumerable(itertools.count()).contains(10),
+            u"contains should stop at the first match")
+        self.assertEqual(
+            Enumerable(itertools.count()).first(),
+            0,
+            u"first should stop at the first element")
+        self.assertEqual(
+            Enumerable(itertools.count()).first_or_default(),
+            0,
+            u"first_or_default should stop at the first element")
+        self.assertRaises(
+            MoreThanOneMatchingElement,
+            Enumerable(itertools.count()).single,
+            lambda x: x > 10)
+        self.assertRaises(
+            MoreThanOneMatchingElement,
+            Enumerable(itertools.count()).single_or_default,
+            lambda x: x > 10)
+        self.assertRaises(NullArgumentError, self.simple.all, None)
+
+    def test_partial_iteration(self):
+        generated = Enumerable(x for x in _simple)
+        self.assertEqual(generated.first(), 1)
+        self.assertTrue(generated.any(lambda x: x == 2))
+        self.assertListEqual(
+            generated.to_list(),
+            _simple,
+            u"Partial iteration should not lose elements of a generator")
+        self.assertListEqual(
+            generated.to_list(),
+            _simple,
+            u"Generator elements should be cached after full iteration")
+
     def test_contains(self):
         self.assertFalse(
             self.empty.contains(1),
@@ -577,6 +846,56 @@ class TestFunctions(TestCase):
             [{'course': 'Biology', 'mark': 85}]
         )
 
+    def test_symmetric_except(self):
+        self.assertRaises(TypeError, self.empty.symmetric_except, [])
+        self.assertListEqual(
+            self.empty.symmetric_except(self.empty).to_list(),
+            [],
+            u"Symmetric difference of two empty enumerables yields empty list")
+        self.assertListEqual(
+            self.simple.symmetric_except(self.empty).to_list(),
+            _simple,
+            u"Symmetric difference of simple and empty yields simple list")
+        self.assertListEqual(
+            self.simple.symmetric_except(self.simple).to_list(),
+            [],
+            u"Symmetric difference of simple and simple yields empty list")
+        self.assertListEqual(
+            self.simple.symmetric_except(Enumerable([2, 4, 5])).to_list(),
+            [1, 3, 4, 5],
+            u"Symmetric difference of simple and [2,4,5] yields [1,3,4,5]")
+        self.assertListEqual(
+            self.complex.symmetric_except(
+                Enumerable([{'value': 1}, {'value': 4}]),
+                lambda x: x['value']).to_list(),
+            [{'value': 2}, {'value': 3}, {'value': 4}],
+            u"Should yield [{'value': 2}, {'value': 3}, {'value': 4}]")
+
+    def test_set_operators_streaming(self):
+        self.assertListEqual(
+            Enumerable(itertools.count()).except_(Enumerable([0, 1]))
+            .take(3).to_list(),
+            [2, 3, 4],
+            u"except_ should stream over an infinite sequence")
+        self.assertListEqual(
+            Enumerable(itertools.count()).intersect(Enumerable([5, 1]))
+            .take(2).to_list(),
+            [1, 5],
+            u"intersect should stream over an infinite sequence")
+        self.assertListEqual(
+            Enumerable(itertools.count()).union(Enumerable([1]))
+            .take(3).to_list(),
+            [0, 1, 2],
+            u"union should stream over an infinite sequence")
+        self.assertListEqual(
+            self.simple.intersect(Enumerable([2, 2, 3])).to_list(),
+            [2, 3],
+            u"Duplicate keys in the second sequence should not repeat elements")
+        self.assertListEqual(
+            Enumerable([[1], [2], [3]]).except_(Enumerable([[2]])).to_list(),
+            [[1], [3]],
+            u"except_ should support unhashable keys")
+
     def test_union(self):
         self.assertListEqual(
             self.empty.union(self.empty).to_list(),
@@ -666,6 +985,40 @@ class TestFunctions(TestCase):
             [(1, 1), (2, 2), (3, 3)],
             u"Should yield [(1,1), (2,2), (3,3)]")
 
+    def test_join_build_side(self):
+        orders = Enumerable([(1, 'a'), (2, 'b'), (1, 'c'), (3, 'd')])
+        customers = Enumerable([(1, 'x'), (2, 'y'), (1, 'z')])
+        expected = [
+            ('a', 'x'), ('a', 'z'), ('b', 'y'), ('c', 'x'), ('c', 'z')
+        ]
+        for build_side in ['inner', 'outer', 'auto']:
+            self.assertListEqual(
+                orders.join(
+                    customers,
+                    lambda o: o[0],
+                    lambda c: c[0],
+                    lambda r: (r[0][1], r[1][1]),
+                    build_side=build_side).to_list(),
+                expected,
+                u"Join with {0} build side should keep outer order".format(
+                    build_side))
+        self.assertRaises(
+            ValueError,
+            orders.join,
+            customers,
+            build_side='left')
+
+        self.assertListEqual(
+            Enumerable([[1], [2]]).join(Enumerable([[2], [3]])).to_list(),
+            [([2], [2])],
+            u"Join should support unhashable keys")
+
+        generated = Enumerable(x for x in range(1, 4))
+        self.assertListEqual(
+            generated.join(self.simple, build_side='outer').to_list(),
+            [(1, 1), (2, 2), (3, 3)],
+            u"Join should hash outer generator")
+
     def test_group_join(self):
         self.assertRaises(TypeError, self.empty.group_join, [])
         self.assertListEqual(
@@ -755,6 +1108,31 @@ class TestFunctions(TestCase):
                     [] if i == 0 else [i + 1])
             )
 
+    def test_group_join_hash(self):
+        orders = Enumerable([(1, 'a'), (2, 'b'), (1, 'c')])
+        customers = Enumerable([(2, 'y'), (1, 'x'), (3, 'z')])
+        self.assertListEqual(
+            customers.group_join(
+                orders,
+                lambda c: c[0],
+                lambda o: o[0],
+                lambda r: (r[0][1], r[1].select(lambda o: o[1]).to_list())
+            ).to_list(),
+            [('y', ['b']), ('x', ['a', 'c']), ('z', [])],
+            u"Group join should keep outer order and inner match order")
+        self.assertListEqual(
+            Enumerable([1, 1]).group_join(
+                Enumerable([1]),
+                result_func=lambda r: (r[0], r[1].count())).to_list(),
+            [(1, 1), (1, 1)],
+            u"Every outer element should be yielded")
+        self.assertListEqual(
+            Enumerable(itertools.count()).group_join(
+                self.simple,
+                result_func=lambda r: r[1].count()).take(4).to_list(),
+            [0, 1, 1, 1],
+            u"Group join should stream the outer sequence")
+
     def test_then_by(self):
         locations = Enumerable(_locations)
         self.assertListEqual(
@@ -811,6 +1189,86 @@ class TestFunctions(TestCase):
             u"then_by_descending ordering is not correct"
         )
 
+    def test_sorted_key_chain(self):
+        locations = Enumerable(_locations)
+        by_country = locations.order_by(lambda loc: loc[0])
+        by_city = by_country.then_by_descending(lambda loc: loc[1])
+        by_branch = by_country.then_by(lambda loc: loc[2]).then_by(lambda loc: loc[1])
+        self.assertListEqual(
+            by_city.select(lambda loc: loc[1]).to_list(),
+            [
+                'Manchester', 'Manchester', 'London', 'London', 'London',
+                'Liverpool', 'Liverpool', 'Glasgow', 'Glasgow', 'Edinburgh',
+                'Cardiff', 'Cardiff', 'Bangor'
+            ],
+            u"Descending order should work on string keys")
+        self.assertListEqual(
+            by_branch.select(lambda loc: (loc[2], loc[1])).take(4).to_list(),
+            [
+                ('Branch1', 'Liverpool'), ('Branch1', 'London'),
+                ('Branch1', 'Manchester'), ('Branch2', 'Liverpool')
+            ],
+            u"Derived orderings should not share key chains")
+        self.assertListEqual(
+            by_country.select(lambda loc: loc[3]).take(3).to_list(),
+            [90000, 80000, 70000],
+            u"Parent ordering should keep its key chain and stability")
+        self.assertListEqual(
+            locations.order_by_descending(lambda loc: loc[0])
+            .then_by_descending(lambda loc: loc[3])
+            .select(lambda loc: loc[3]).take(3).to_list(),
+            [30000, 29700, 12800],
+            u"All descending key chain is not correct")
+
+        calls = []
+
+        def key(loc):
+            calls.append(loc)
+            return loc[3]
+
+        ordered = locations.order_by(key).then_by(lambda loc: loc[1])
+        for _ in range(3):
+            ordered.to_list()
+        self.assertEqual(
+            len(calls),
+            len(_locations),
+            u"Ordered enumerable should be sorted only once")
+
+    def test_sorted_top_k(self):
+        rng = random.Random(3)
+        rows = [(rng.randint(0, 20), rng.randint(0, 5), i) for i in range(500)]
+        expected = sorted(
+            sorted(rows, key=lambda r: r[1], reverse=True), key=lambda r: r[0])
+        ordered = Enumerable(rows).order_by(lambda r: r[0]) \
+            .then_by_descending(lambda r: r[1])
+        self.assertListEqual(ordered.take(25).to_list(), expected[:25])
+        self.assertEqual(ordered.first(), expected[0])
+        self.assertEqual(ordered.element_at(42), expected[42])
+        self.assertRaises(NoElementsError, ordered.element_at, 500)
+        self.assertRaises(NoElementsError, ordered.element_at, -1)
+        self.assertIsNone(ordered.element_at_or_default(500))
+        self.assertListEqual(ordered.take(0).to_list(), [])
+        self.assertListEqual(ordered.take(1000).to_list(), expected)
+        self.assertRaises(
+            NoElementsError, Enumerable([]).order_by(lambda x: x).first)
+
+        descending = sorted(rows, key=lambda r: r[0], reverse=True)
+        self.assertListEqual(
+            Enumerable(rows).order_by_descending(lambda r: r[0])
+            .take(30).to_list(),
+            descending[:30],
+            u"Descending top k should keep the order of equal keys")
+        self.assertListEqual(
+            Enumerable(rows).top_k(30, lambda r: r[0]).to_list(),
+            descending[:30])
+        self.assertListEqual(
+            Enumerable(rows).bottom_k(30, lambda r: r[0]).to_list(),
+            sorted(rows, key=lambda r: r[0])[:30])
+        self.assertListEqual(
+            Enumerable(itertools.islice(itertools.count(), 10 ** 5))
+            .top_k(3).to_list(),
+            [99999, 99998, 99997])
+
     def reverse(self, result, element):
         return element + " " + result
 
@@ -828,6 +1286,13 @@ class TestFunctions(TestCase):
         test = self.simple.aggregate(self.sum, seed=0)
         self.assertEqual(test, 6)
 
+        test = Enumerable((x for x in range(5)), cache_policy='none') \
+            .aggregate(self.sum)
+        self.assertEqual(test, 10, u"Should aggregate in a single pass")
+        test = Enumerable((x for x in range(5)), cache_policy='none') \
+            .aggregate(self.sum, seed=10)
+        self.assertEqual(test, 20)
+
     def test_all(self):
         test = Enumerable([1, 1, 1]).all(lambda x: x == 1)
         self.assertTrue(test)
@@ -872,6 +1337,34 @@ class TestFunctions(TestCase):
         test = Enumerable(words).reverse()
         self.assertEqual(u" ".join(test.to_list()), u"dog lazy the over jumps fox brown quick the")
 
+    def test_reverse_large(self):
+        self.assertListEqual(
+            Enumerable(x for x in range(200000)).reverse().take(3).to_list(),
+            [199999, 199998, 199997],
+            u"reverse should buffer generators in a single pass")
+        self.assertListEqual(self.empty.reverse().to_list(), [])
+        self.assertListEqual(
+            Enumerable([3, 1, 2]).order_by(lambda x: x).reverse().to_list(),
+            [3, 2, 1])
+
+    def test_reversed_view(self):
+        data = list(range(10))
+        view = Enumerable(data).reversed_view()
+        self.assertListEqual(view.to_list(), data[::-1])
+        self.assertEqual(view.element_at(2), 7)
+        self.assertEqual(view.last(), 0)
+        self.assertEqual(view.count(), 10)
+        self.assertListEqual(view.take_last(2).to_list(), [1, 0])
+        self.assertListEqual(view.reverse().to_list(), data)
+        self.assertListEqual(
+            Enumerable.range(0, 10 ** 9).reversed_view().take(2).to_list(),
+            [10 ** 9 - 1, 10 ** 9 - 2],
+            u"reversed_view should not copy the data")
+        self.assertListEqual(
+            Enumerable(x for x in _simple).reversed_view().to_list(),
+            [3, 2, 1],
+            u"reversed_view should fall back to reverse for generators")
+
     def test_skip_last(self):
         test = Enumerable([1, 2, 3, 4, 5]).skip_last(2)
         self.assertListEqual(test.to_list(), [1, 2, 3])
@@ -879,6 +1372,44 @@ class TestFunctions(TestCase):
         test = Enumerable(["one", "two", "three", "four", "five"]).skip(1).skip_last(1)
         self.assertListEqual(test.to_list(), ["two", "three", "four"])
 
+    def test_positional_streaming(self):
+        self.assertEqual(
+            Enumerable(itertools.count()).element_at(5),
+            5,
+            u"element_at should stop at the given index")
+        self.assertRaises(NoElementsError, self.simple.element_at, 3)
+        self.assertRaises(NoElementsError, self.simple.element_at, -1)
+        self.assertIsNone(self.simple.element_at_or_default(3))
+        self.assertEqual(Enumerable.range(0, 10 ** 9).element_at(10 ** 8), 10 ** 8)
+        self.assertEqual(Enumerable.range(0, 10 ** 9).last(), 10 ** 9 - 1)
+        self.assertEqual(Enumerable.range(0, 10 ** 9).count(), 10 ** 9)
+
+        generated = Enumerable(x for x in range(10))
+        self.assertEqual(generated.element_at(3), 3)
+        self.assertEqual(generated.last(), 9)
+        self.assertEqual(Enumerable(x for x in range(10)).last(), 9)
+        self.assertIsNone(Enumerable(x for x in []).last_or_default())
+        self.assertListEqual(
+            Enumerable(x for x in range(10)).take_last(3).to_list(),
+            [7, 8, 9])
+        self.assertListEqual(
+            Enumerable(x for x in range(10)).skip_last(7).to_list(),
+            [0, 1, 2])
+        self.assertListEqual(self.simple.take_last(5).to_list(), _simple)
+        self.assertListEqual(self.simple.take_last(0).to_list(), [])
+        self.assertListEqual(self.simple.skip_last(5).to_list(), [])
+        self.assertListEqual(self.simple.skip_last(0).to_list(), _simple)
+        self.assertListEqual(
+            Enumerable(x for x in _simple).skip_last(0).to_list(),
+            _simple)
+        self.assertListEqual(
+            Enumerable.range(0, 10 ** 9).take_last(2).to_list(),
+            [10 ** 9 - 2, 10 ** 9 - 1])
+        self.assertEqual(
+            Enumerable([3, 1, 2]).order_by(lambda x: x).last(),
+            3,
+            u"Sorted enumerable should not index unsorted data")
+
     def test_skip_while(self):
         test = Enumerable([1, 4, 6, 4, 1]).skip_while(lambda x: x < 5)
         self.assertListEqual(test.to_list(), [6, 4, 1])
@@ -893,6 +1424,12 @@ class TestFunctions(TestCase):
         test = Enumerable(["one", "two", "three", "four", "five"]).take(3).take_last(1)
         self.assertListEqual(test.to_list(), ["three"])
 
+        test = Enumerable(collections.deque([1, 2, 3])).take_last(2)
+        self.assertListEqual(test.to_list(), [2, 3])
+        self.assertListEqual(
+            Enumerable(collections.deque([1, 2, 3])).take_last(5).to_list(),
+            [1, 2, 3])
+
     def test_take_while(self):
         test = Enumerable([1, 4, 6, 4, 1]).take_while(lambda x: x < 5)
         self.assertListEqual(test.to_list(), [1, 4])
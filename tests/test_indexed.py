@@ -0,0 +1,79 @@
+from unittest import TestCase
+from py_linq.exceptions import NullArgumentError
+from py_linq.py_linq3 import Enumerable3, IndexedEnumerable3
+from tests import _locations
+
+
+class TestIndexedEnumerable(TestCase):
+    def setUp(self):
+        self.rows = [
+            {'tenant': 'a', 'ts': 5},
+            {'tenant': 'b', 'ts': 1},
+            {'tenant': 'a', 'ts': 3},
+            {'tenant': 'c', 'ts': 3},
+            {'tenant': 'b', 'ts': 9},
+        ]
+        self.indexed = IndexedEnumerable3(self.rows) \
+            .add_hash_index('tenant', lambda r: r['tenant']) \
+            .add_sorted_index('ts', lambda r: r['ts'])
+
+    def test_constructor(self):
+        self.assertIsInstance(self.indexed, Enumerable3)
+        self.assertRaises(TypeError, IndexedEnumerable3, 1)
+        self.assertRaises(NullArgumentError, self.indexed.add_hash_index, 'x', None)
+        self.assertEqual(self.indexed.count(), 5)
+
+    def test_where_eq(self):
+        self.assertListEqual(
+            self.indexed.where_eq('tenant', 'a').to_list(),
+            [self.rows[0], self.rows[2]],
+            u"Hash index should return matches in insertion order")
+        self.assertListEqual(self.indexed.where_eq('tenant', 'z').to_list(), [])
+        self.assertListEqual(
+            self.indexed.where_eq('ts', 3).to_list(),
+            [self.rows[2], self.rows[3]],
+            u"Sorted index should answer equality queries")
+        self.assertRaises(KeyError, self.indexed.where_eq, 'missing', 1)
+
+    def test_where_range(self):
+        self.assertListEqual(
+            self.indexed.where_range('ts', 3, 9).select(lambda r: r['ts']).to_list(),
+            [3, 3, 5],
+            u"Range should include lo and exclude hi")
+        self.assertListEqual(
+            self.indexed.where_range('ts', hi=3).to_list(),
+            [self.rows[1]])
+        self.assertListEqual(
+            self.indexed.where_range('ts', lo=6).to_list(),
+            [self.rows[4]])
+        self.assertRaises(TypeError, self.indexed.where_range, 'tenant', 'a', 'b')
+
+    def test_incremental_update(self):
+        row = {'tenant': 'a', 'ts': 4}
+        result = self.indexed.append(row)
+        self.assertIs(result, self.indexed, u"append should modify in place")
+        self.indexed.add(None)
+        self.indexed.add({'tenant': 'd', 'ts': 0})
+        self.assertEqual(self.indexed.count(), 7)
+        self.assertListEqual(
+            self.indexed.where_eq('tenant', 'a').to_list(),
+            [self.rows[0], self.rows[2], row])
+        self.assertListEqual(
+            self.indexed.where_range('ts', 3, 5).select(lambda r: r['ts']).to_list(),
+            [3, 3, 4])
+        self.assertEqual(self.indexed.where_range('ts', hi=1).count(), 1)
+
+    def test_matches_scan(self):
+        locations = IndexedEnumerable3(_locations) \
+            .add_hash_index('country', lambda loc: loc[0]) \
+            .add_sorted_index('revenue', lambda loc: loc[3])
+        scan = Enumerable3(_locations)
+        self.assertListEqual(
+            locations.where_eq('country', 'Wales').to_list(),
+            scan.where(lambda loc: loc[0] == 'Wales').to_list())
+        self.assertListEqual(
+            locations.where_range('revenue', 20000, 50000).to_list(),
+            scan.where(lambda loc: 20000 <= loc[3] < 50000)
+            .order_by(lambda loc: loc[3]).to_list())
+        locations.drop_index('country')
+        self.assertRaises(KeyError, locations.where_eq, 'country', 'Wales')
@@ -0,0 +1,141 @@
+import math
+from unittest import TestCase, skipIf
+from py_linq import Enumerable
+from py_linq.exceptions import NoElementsError, NullArgumentError
+from py_linq.numeric import numpy
+from py_linq.py_linq3 import NumericEnumerable3
+
+
+@skipIf(numpy is None, u"NumPy is not installed")
+class TestNumericEnumerable(TestCase):
+    def setUp(self):
+        self.values = [3.5, -1.0, 7.25, 0.0, 2.0, 9.5, -4.75]
+        self.numeric = Enumerable.from_array(self.values)
+        self.generic = Enumerable(self.values)
+
+    def test_constructor(self):
+        array = numpy.arange(5)
+        self.assertIsInstance(Enumerable(array), NumericEnumerable3)
+        self.assertIs(Enumerable(array).data, array, u"Arrays are not copied")
+        self.assertIsInstance(Enumerable.from_array(range(3)), NumericEnumerable3)
+        self.assertEqual(
+            Enumerable.from_array([1, 2], dtype=numpy.float32).data.dtype,
+            numpy.float32)
+        self.assertNotIsInstance(
+            Enumerable(numpy.array([u'a', u'b'])), NumericEnumerable3)
+        self.assertNotIsInstance(
+            Enumerable(numpy.zeros((2, 2))), NumericEnumerable3)
+        self.assertRaises(TypeError, Enumerable.from_array, [u'a'])
+        self.assertRaises(TypeError, Enumerable.from_array, [[1], [2]])
+
+    def test_iteration_yields_python_numbers(self):
+        self.assertListEqual(list(self.numeric), self.values)
+        self.assertIs(type(next(iter(Enumerable(numpy.arange(3))))), int)
+        self.assertListEqual(self.numeric.to_list(), self.values)
+        self.assertEqual(self.numeric.count(), len(self.values))
+
+    def test_aggregations(self):
+        for name in [u'sum', u'min', u'max', u'avg', u'median']:
+            self.assertAlmostEqual(
+                getattr(self.numeric, name)(), getattr(self.generic, name)())
+            self.assertAlmostEqual(
+                getattr(self.numeric, name)(lambda x: x * x + 1),
+                getattr(self.generic, name)(lambda x: x * x + 1))
+        self.assertEqual(Enumerable.from_array([4, 1, 3, 2]).median(), 2.5)
+        self.assertEqual(Enumerable.from_array([4, 1, 3]).median(), 3)
+        stats = self.numeric.stats(variance=True)
+        expected = self.generic.stats(variance=True)
+        self.assertEqual(stats.count, expected.count)
+        self.assertAlmostEqual(stats.mean, expected.mean)
+        self.assertAlmostEqual(stats.variance, expected.variance)
+
+    def test_empty(self):
+        empty = Enumerable.from_array([])
+        self.assertEqual(empty.sum(), 0)
+        self.assertEqual(empty.count(), 0)
+        for name in [u'min', u'max', u'avg', u'median', u'stats']:
+            self.assertRaises(NoElementsError, getattr(empty, name))
+        self.assertRaises(
+            NoElementsError, self.numeric.where(lambda x: x > 100).min)
+
+    def test_integer_sum_does_not_overflow(self):
+        numeric = Enumerable.from_array(numpy.array([2 ** 62] * 4))
+        self.assertEqual(numeric.sum(), 2 ** 64)
+        self.assertEqual(numeric.sum(lambda x: x // 2 ** 61), 8)
+
+    def test_integer_overflow_falls_back(self):
+        values = [1, 2 ** 40, 3]
+        numeric = Enumerable(numpy.array(values))
+        self.assertListEqual(
+            numeric.select(lambda x: x * x).to_list(), [x * x for x in values])
+        self.assertEqual(
+            numeric.sum(lambda x: x * x), sum(x * x for x in values))
+        self.assertEqual(
+            numeric.max(lambda x: x * x * 2 // 2), 2 ** 80)
+        self.assertListEqual(
+            numeric.where(lambda x: x * x > 10).to_list(), [2 ** 40])
+        self.assertTrue(numeric.any(lambda x: x * x > 2 ** 70))
+        values = [1, -2 ** 63, 2]
+        self.assertListEqual(
+            Enumerable(numpy.array(values)).select(lambda x: -x).to_list(),
+            [-x for x in values])
+        unsigned = Enumerable(numpy.array([3, 0, 5], dtype=numpy.uint64))
+        self.assertListEqual(
+            unsigned.select(lambda x: x - 1).to_list(), [2, -1, 4])
+        flags = Enumerable(numpy.array([True, True, False]))
+        self.assertListEqual(
+            flags.select(lambda x: x + x).to_list(), [2, 2, 0])
+
+    def test_integer_arithmetic_is_vectorized(self):
+        numeric = Enumerable(numpy.arange(10))
+        self.assertIsInstance(
+            numeric.select(lambda x: x * 3 + 1), NumericEnumerable3)
+        self.assertIsInstance(
+            numeric.where(lambda x: x % 2 == 0), NumericEnumerable3)
+        self.assertEqual(numeric.sum(lambda x: x * x), 285)
+
+    def test_vectorized_select_and_where(self):
+        query = self.numeric.where(lambda x: x > 0).select(lambda x: x * 2)
+        self.assertIsInstance(query, NumericEnumerable3)
+        self.assertListEqual(
+            query.to_list(),
+            self.generic.where(lambda x: x > 0).select(lambda x: x * 2).to_list())
+        mask = self.numeric.select(lambda x: x > 2)
+        self.assertListEqual(mask.to_list(), [x > 2 for x in self.values])
+        self.assertIs(type(mask.first()), bool)
+        self.assertIsInstance(self.numeric.select(abs), NumericEnumerable3)
+        self.assertEqual(self.numeric.select(abs).min(), 0.0)
+        self.assertIsInstance(
+            self.numeric.where(lambda x: x > 0).select(numpy.sqrt),
+            NumericEnumerable3)
+        self.assertTrue(self.numeric.any(lambda x: x < -4))
+        self.assertFalse(self.numeric.all(lambda x: x < 9))
+        self.assertRaises(NullArgumentError, self.numeric.where, None)
+
+    def test_generic_fallback(self):
+        functions = [
+            math.sqrt,
+            round,
+            str,
+            lambda x: x if x > 0 else 0,
+            lambda x: [x],
+        ]
+        positive = Enumerable.from_array([4.0, 0.5, 9.0])
+        for func in functions:
+            result = positive.select(func)
+            self.assertNotIsInstance(result, NumericEnumerable3)
+            self.assertListEqual(
+                result.to_list(), [func(x) for x in [4.0, 0.5, 9.0]])
+        query = self.numeric.where(lambda x: x > 0 and x < 5)
+        self.assertNotIsInstance(query, NumericEnumerable3)
+        self.assertListEqual(query.to_list(), [3.5, 2.0])
+        self.assertEqual(self.numeric.sum(lambda x: max(x, 0)), 22.25)
+        self.assertRaises(
+            ZeroDivisionError,
+            Enumerable.from_array([1.0, 0.0]).select(lambda x: 1 / x).to_list)
+
+    def test_generic_operators(self):
+        self.assertListEqual(self.numeric.skip(5).to_list(), [9.5, -4.75])
+        self.assertEqual(self.numeric.order_by(lambda x: x).first(), -4.75)
+        self.assertListEqual(
+            self.numeric.select(lambda x: x * 2).take(2).to_list(), [7.0, -2.0])
@@ -0,0 +1,260 @@
+import concurrent.futures
+import itertools
+import multiprocessing
+import operator
+import threading
+import time
+from unittest import TestCase
+from py_linq import Enumerable
+from py_linq.exceptions import NoElementsError, NullArgumentError
+from py_linq.py_linq3 import ParallelEnumerable3
+from tests import _locations
+
+
+def square(x):
+    return x * x
+
+
+def is_odd(x):
+    return x % 2 == 1
+
+
+def pair(x):
+    return [x, -x]
+
+
+def country(location):
+    return location[0]
+
+
+def append(result, element):
+    result.append(element)
+    return result
+
+
+def fail_on_seven(x):
+    if x == 7:
+        raise ValueError(u"seven")
+    return x
+
+
+class TestParallelEnumerable(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = concurrent.futures.ProcessPoolExecutor(2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown()
+
+    def parallel(self, data, chunk_size=7):
+        return Enumerable(data).as_parallel(
+            chunk_size=chunk_size, executor=self.executor)
+
+    def test_as_parallel(self):
+        parallel = self.parallel(range(10))
+        self.assertIsInstance(parallel, ParallelEnumerable3)
+        self.assertIsInstance(parallel.select(square), ParallelEnumerable3)
+        self.assertTrue(parallel.is_ordered)
+        self.assertRaises(ValueError, Enumerable([1]).as_parallel, chunk_size=0)
+        self.assertRaises(ValueError, Enumerable([1]).as_parallel, workers=0)
+
+    def test_ordered(self):
+        data = list(range(100))
+        result = self.parallel(data).where(is_odd).select(square) \
+            .select_many(pair).to_list()
+        expected = Enumerable(data).where(is_odd).select(square) \
+            .select_many(pair).to_list()
+        self.assertListEqual(result, expected)
+        self.assertListEqual(self.parallel([]).select(square).to_list(), [])
+
+    def test_unordered(self):
+        data = list(range(100))
+        unordered = self.parallel(data, chunk_size=3).as_unordered()
+        self.assertFalse(unordered.is_ordered)
+        self.assertTrue(unordered.as_ordered().is_ordered)
+        self.assertListEqual(
+            sorted(unordered.select(square).to_list()),
+            [x * x for x in data])
+
+    def test_as_sequential(self):
+        sequential = self.parallel(range(10)).select(square).as_sequential()
+        self.assertIs(type(sequential), Enumerable)
+        self.assertListEqual(
+            sequential.where(lambda x: x > 10).take(2).to_list(), [16, 25])
+
+    def test_sequential_operators(self):
+        parallel = self.parallel(range(20)).select(square)
+        self.assertEqual(parallel.count(), 20)
+        self.assertEqual(parallel.order_by_descending(lambda x: x).first(), 361)
+
+    def test_infinite_source(self):
+        result = self.parallel(itertools.count(), chunk_size=5).select(square) \
+            .take(4).to_list()
+        self.assertListEqual(result, [0, 1, 4, 9])
+
+    def test_pool_shut_down_after_early_exit(self):
+        children = set(multiprocessing.active_children())
+        parallel = Enumerable(itertools.count()).as_parallel(
+            workers=2, chunk_size=4).select(square)
+        self.assertEqual(parallel.first(), 0)
+        self.assertSetEqual(set(multiprocessing.active_children()), children)
+        self.assertListEqual(parallel.take(3).to_list(), [0, 1, 4])
+        self.assertSetEqual(set(multiprocessing.active_children()), children)
+        self.assertListEqual(
+            parallel.where(is_odd).take(2).to_list(), [1, 9],
+            u"Every enumeration runs the query again")
+        self.assertSetEqual(set(multiprocessing.active_children()), children)
+
+    def test_worker_exception(self):
+        parallel = self.parallel(range(10)).select(fail_on_seven)
+        self.assertRaises(ValueError, parallel.to_list)
+
+    def test_own_process_pool(self):
+        result = Enumerable(range(10)).as_parallel(workers=2, chunk_size=4) \
+            .select(square).to_list()
+        self.assertListEqual(result, [x * x for x in range(10)])
+
+    def test_thread_pool_executor(self):
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            result = Enumerable(range(10)) \
+                .as_parallel(chunk_size=3, executor=executor) \
+                .where(lambda x: x > 4).select(lambda x: x + 1).to_list()
+        self.assertListEqual(result, [6, 7, 8, 9, 10])
+
+    def test_reductions(self):
+        data = list(range(1, 101))
+        parallel = self.parallel(data).where(is_odd)
+        self.assertEqual(parallel.count(), 50)
+        self.assertEqual(parallel.sum(), 2500)
+        self.assertEqual(parallel.sum(square), sum(x * x for x in data if x % 2))
+        self.assertEqual(parallel.min(), 1)
+        self.assertEqual(parallel.max(square), 99 * 99)
+        empty = self.parallel([2, 4]).where(is_odd)
+        self.assertEqual(empty.count(), 0)
+        self.assertEqual(empty.sum(), 0)
+        self.assertRaises(NoElementsError, empty.min)
+        self.assertRaises(NoElementsError, empty.max)
+
+    def test_aggregate_with_combine(self):
+        data = list(range(50))
+        parallel = self.parallel(data, chunk_size=6)
+        self.assertEqual(
+            parallel.aggregate(operator.add, 0, operator.add), sum(data))
+        self.assertEqual(
+            parallel.aggregate(operator.add, None, operator.add), sum(data))
+        self.assertListEqual(
+            parallel.aggregate(append, [], operator.add), data,
+            u"Partial results should be combined in order")
+        self.assertListEqual(
+            sorted(parallel.as_unordered().aggregate(append, [], operator.add)),
+            data)
+        self.assertRaises(
+            NoElementsError,
+            self.parallel([2]).where(is_odd).aggregate,
+            operator.add, 0, operator.add)
+
+    def test_aggregate_without_combine(self):
+        self.assertEqual(
+            self.parallel(range(5)).aggregate(lambda a, b: a * 10 + b), 1234)
+
+    def test_group_by(self):
+        parallel = self.parallel(_locations, chunk_size=2)
+        expected = Enumerable(_locations).group_by(
+            key_names=['country'], key=country)
+        result = parallel.group_by(key_names=['country'], key=country)
+        self.assertListEqual(
+            [(g.key.country, g.to_list()) for g in result],
+            [(g.key.country, g.to_list()) for g in expected])
+        counts = parallel.as_unordered().group_by(
+            key_names=['country'], key=country, ordered_keys=True,
+            result_func=lambda g: (g.key.country, g.count())).to_list()
+        self.assertListEqual(
+            counts, [('England', 7), ('Scotland', 3), ('Wales', 3)])
+        self.assertListEqual(
+            self.parallel(range(6)).group_by(key=is_odd).select(
+                lambda g: g.to_list()).to_list(),
+            [[0, 2, 4], [1, 3, 5]])
+
+
+class TestSelectConcurrent(TestCase):
+    def test_ordered(self):
+        def slow(x):
+            time.sleep(0.01 * (x % 3))
+            return x * 2
+
+        result = Enumerable(range(20)).select_concurrent(slow, max_workers=4)
+        self.assertListEqual(result.to_list(), [x * 2 for x in range(20)])
+
+    def test_unordered(self):
+        def slow(x):
+            time.sleep(0.05 if x == 0 else 0)
+            return x
+
+        result = Enumerable(range(5)).select_concurrent(
+            slow, max_workers=5, ordered=False).to_list()
+        self.assertListEqual(sorted(result), list(range(5)))
+        self.assertEqual(result[-1], 0, u"The slowest call should come last")
+
+    def test_runs_concurrently(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def io(x):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.02)
+            with lock:
+                state['running'] -= 1
+            return x
+
+        start = time.time()
+        Enumerable(range(16)).select_concurrent(io, max_workers=8).to_list()
+        self.assertLess(time.time() - start, 16 * 0.02)
+        self.assertGreater(state['peak'], 1)
+        self.assertLessEqual(state['peak'], 8)
+
+    def test_bounded_prefetch(self):
+        submitted = []
+
+        def record(x):
+            submitted.append(x)
+            return x
+
+        result = Enumerable(itertools.count()).select_concurrent(
+            record, max_workers=2, prefetch=3).take(5).to_list()
+        self.assertListEqual(result, [0, 1, 2, 3, 4])
+        self.assertLessEqual(len(submitted), 5 + 3)
+
+    def test_results_not_cached(self):
+        result = Enumerable(itertools.count(), cache_policy='none') \
+            .select_concurrent(square, max_workers=2)
+        self.assertEqual(result.cache_policy, 'none')
+        self.assertEqual(
+            sum(1 for _ in itertools.islice(result, 20000)), 20000)
+        self.assertIsNone(result._memo, u"Results should not be memoized")
+        result = Enumerable(range(5)).select_concurrent(square)
+        self.assertListEqual(result.to_list(), [0, 1, 4, 9, 16])
+        self.assertListEqual(
+            result.to_list(),
+            [0, 1, 4, 9, 16],
+            u"Every enumeration should run the selector again")
+
+    def test_exceptions(self):
+        result = Enumerable(range(10)).select_concurrent(
+            fail_on_seven, max_workers=3, return_exceptions=True).to_list()
+        self.assertListEqual(result[:7], list(range(7)))
+        self.assertIsInstance(result[7], ValueError)
+        self.assertListEqual(result[8:], [8, 9])
+        self.assertRaises(
+            ValueError,
+            Enumerable(range(10)).select_concurrent(fail_on_seven).to_list)
+
+    def test_arguments(self):
+        self.assertRaises(
+            NullArgumentError, Enumerable([1]).select_concurrent, None)
+        self.assertRaises(
+            ValueError, Enumerable([1]).select_concurrent, square, max_workers=0)
+        self.assertRaises(
+            ValueError, Enumerable([1]).select_concurrent, square, prefetch=0)
@@ -0,0 +1,169 @@
+import itertools
+import random
+from unittest import TestCase
+from py_linq import Enumerable
+from py_linq.pipeline import CompiledPipeline, Pipeline, _generate, fuse
+
+
+class TestPipeline(TestCase):
+    def test_chain_extends_pipeline(self):
+        source = Enumerable(range(10))
+        chain = source.select(lambda x: x * 2).where(lambda x: x % 3 == 0) \
+            .skip(1).take(2)
+        self.assertIsInstance(chain.data, Pipeline)
+        self.assertIs(chain.data.source, source)
+        self.assertListEqual(
+            [operator for operator, _ in chain.data.stages],
+            ['select', 'where', 'skip', 'take'])
+        self.assertListEqual(chain.to_list(), [6, 12])
+
+    def test_intermediate_enumerables(self):
+        evens = Enumerable(range(10)).where(lambda x: x % 2 == 0)
+        squares = evens.select(lambda x: x * x)
+        halves = evens.select(lambda x: x // 2)
+        self.assertListEqual(squares.to_list(), [0, 4, 16, 36, 64])
+        self.assertListEqual(halves.to_list(), [0, 1, 2, 3, 4])
+        self.assertListEqual(evens.to_list(), [0, 2, 4, 6, 8])
+
+    def test_read_enumerable_is_not_extended(self):
+        calls = []
+
+        def record(x):
+            calls.append(x)
+            return x
+
+        selected = Enumerable(iter(range(5))).select(record)
+        self.assertEqual(selected.count(), 5)
+        self.assertListEqual(selected.where(lambda x: x > 2).to_list(), [3, 4])
+        self.assertListEqual(
+            calls, [0, 1, 2, 3, 4],
+            u"Stages applied to a memoized enumerable should read the memo")
+
+    def test_one_shot_source(self):
+        chain = Enumerable(x for x in range(10)).select(lambda x: x + 1) \
+            .where(lambda x: x % 2 == 0).take(3)
+        self.assertListEqual(chain.to_list(), [2, 4, 6])
+        self.assertListEqual(chain.to_list(), [2, 4, 6])
+
+    def test_select_many_and_while(self):
+        chain = Enumerable([[1, 2], [3], [4, 5, 6]]).select_many() \
+            .skip_while(lambda x: x < 2).take_while(lambda x: x < 6)
+        self.assertListEqual(
+            [operator for operator, _ in chain.data.stages],
+            ['select_many', 'skip_while', 'take_while'])
+        self.assertListEqual(chain.to_list(), [2, 3, 4, 5])
+
+    def test_fuse_slices(self):
+        self.assertListEqual(
+            fuse((('skip', 2), ('take', 5), ('skip', 1))), [('slice', (3, 7))])
+        self.assertListEqual(
+            fuse((('take', -1),)), [('slice', (0, 0))])
+        where = ('where', bool)
+        self.assertListEqual(
+            fuse((('skip', 1), where, ('take', 2))),
+            [('slice', (1, None)), where, ('slice', (0, 2))])
+
+    def test_fused_slices_match_list_slicing(self):
+        rng = random.Random(11)
+        data = list(range(30))
+        for _ in range(200):
+            enumerable = Enumerable(data)
+            expected = data
+            for _ in range(rng.randint(1, 5)):
+                n = rng.randint(0, 12)
+                if rng.random() < 0.5:
+                    enumerable = enumerable.skip(n)
+                    expected = expected[n:]
+                else:
+                    enumerable = enumerable.take(n)
+                    expected = expected[:n]
+            self.assertEqual(len(fuse(enumerable.data.stages)), 1)
+            self.assertListEqual(enumerable.to_list(), expected)
+
+    def test_stops_reading_source(self):
+        source = itertools.count()
+        chain = Enumerable(source).select(lambda x: x * 10).take(3)
+        self.assertListEqual(chain.to_list(), [0, 10, 20])
+        self.assertEqual(next(source), 3)
+
+
+class TestCompiledPipeline(TestCase):
+    def random_chain(self, enumerable, length, seed):
+        rng = random.Random(seed)
+        for _ in range(length):
+            operator = rng.choice([
+                'select', 'where', 'skip', 'take', 'distinct', 'skip_while',
+                'take_while', 'select_many'])
+            n = rng.randint(0, 8)
+            if operator == 'select':
+                enumerable = enumerable.select(lambda x, n=n: x * 3 + n)
+            elif operator == 'where':
+                enumerable = enumerable.where(lambda x, n=n: x % (n + 2) != 0)
+            elif operator == 'skip':
+                enumerable = enumerable.skip(n)
+            elif operator == 'take':
+                enumerable = enumerable.take(n * 4)
+            elif operator == 'distinct':
+                enumerable = enumerable.distinct(lambda x, n=n: x % (n + 5))
+            elif operator == 'skip_while':
+                enumerable = enumerable.skip_while(lambda x, n=n: x % 7 != n % 7)
+            elif operator == 'take_while':
+                enumerable = enumerable.take_while(lambda x, n=n: x % 11 != n)
+            else:
+                enumerable = enumerable.select_many(lambda x: [x, x + 1])
+        return enumerable
+
+    def test_matches_pipeline(self):
+        rng = random.Random(5)
+        for _ in range(300):
+            seed = rng.random()
+            length = rng.randint(1, 6)
+            expected = self.random_chain(Enumerable(range(60)), length, seed)
+            compiled = self.random_chain(
+                Enumerable(range(60)), length, seed).compile()
+            summed = self.random_chain(
+                Enumerable(range(60)), length, seed).compile()
+            self.assertIsInstance(compiled.data, CompiledPipeline)
+            self.assertListEqual(compiled.to_list(), expected.to_list())
+            self.assertEqual(summed.sum(lambda x: x * 2), expected.sum() * 2)
+
+    def test_generated_once_per_shape(self):
+        def query(limit):
+            return Enumerable(range(50)).where(lambda x: x > limit) \
+                .select(lambda x: x * 2).take(3).compile()
+
+        self.assertListEqual(query(10).to_list(), [22, 24, 26])
+        misses = _generate.cache_info().misses
+        for limit in range(20):
+            self.assertListEqual(
+                query(limit).to_list(),
+                [(limit + 1) * 2, (limit + 2) * 2, (limit + 3) * 2])
+        self.assertEqual(_generate.cache_info().misses, misses)
+
+    def test_code(self):
+        code = Enumerable(range(5)).where(lambda x: x > 1).select(str) \
+            .compile().data.code
+        self.assertIn(u'for x in source:', code)
+        self.assertIn(u'if f0(x):', code)
+        self.assertIn(u'x = f1(x)', code)
+
+    def test_stages_after_compile(self):
+        compiled = Enumerable(range(10)).where(lambda x: x % 2 == 1).compile()
+        chain = compiled.select(lambda x: x * 10).skip(1)
+        self.assertIsInstance(chain.data, CompiledPipeline)
+        self.assertListEqual(chain.to_list(), [30, 50, 70, 90])
+        self.assertListEqual(Enumerable([1, 2]).compile().to_list(), [1, 2])
+        self.assertEqual(Enumerable([]).compile().sum(), 0)
+
+    def test_long_chain(self):
+        enumerable = Enumerable(range(10))
+        for _ in range(150):
+            enumerable = enumerable.select(lambda x: x + 1)
+        self.assertListEqual(
+            enumerable.compile().to_list(), list(range(150, 160)))
+
+    def test_stops_reading_source(self):
+        source = itertools.count()
+        chain = Enumerable(source).where(lambda x: x % 2 == 0).take(3).compile()
+        self.assertListEqual(chain.to_list(), [0, 2, 4])
+        self.assertEqual(next(source), 5)
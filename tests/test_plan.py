@@ -0,0 +1,135 @@
+import random
+from unittest import TestCase
+from py_linq import Enumerable
+from py_linq.exceptions import NoElementsError
+from py_linq.plan import Any, Compare, Count, First, MinBy, OrderBy, Source, \
+    Stage, collapse_takes, count_greater_than_zero_to_any, \
+    first_of_order_by_to_min, push_where_below_order_by
+
+
+class TestPlan(TestCase):
+    def setUp(self):
+        rng = random.Random(3)
+        self.rows = [
+            {'id': i, 'group': rng.randint(0, 4), 'score': rng.randint(0, 9)}
+            for i in range(60)
+        ]
+
+    def test_explain(self):
+        def is_even(r):
+            return r['id'] % 2 == 0
+
+        def by_score(r):
+            return r['score']
+
+        query = Enumerable(self.rows).where(is_even).order_by(by_score) \
+            .then_by_descending(lambda r: r['id']).take(5)
+        self.assertEqual(
+            query.explain(),
+            u"Take(5)\n"
+            u"  OrderBy(by_score asc, <lambda> desc)\n"
+            u"    Where(is_even)\n"
+            u"      Source(list[60])")
+        self.assertEqual(
+            Enumerable(self.rows).select(by_score).compile().explain(),
+            u"Compile\n  Select(by_score)\n    Source(list[60])")
+
+    def test_plan_executes_chain(self):
+        query = Enumerable(self.rows).where(lambda r: r['group'] > 1) \
+            .order_by(lambda r: r['score']).select(lambda r: r['id']).skip(3)
+        plan = query.plan()
+        self.assertIsInstance(plan, Stage)
+        self.assertListEqual(plan.execute().to_list(), query.to_list())
+        self.assertIsInstance(Enumerable([1]).plan(), Source)
+
+    def test_push_where_below_order_by(self):
+        calls = []
+
+        def key(r):
+            calls.append(r)
+            return r['score']
+
+        query = Enumerable(self.rows).order_by(key) \
+            .then_by(lambda r: r['group']).where(lambda r: r['group'] == 2) \
+            .where(lambda r: r['id'] > 10)
+        optimized = query.plan().optimize([push_where_below_order_by])
+        self.assertIsInstance(optimized, OrderBy)
+        self.assertEqual(optimized.children[0].operator, u'where')
+        self.assertEqual(optimized.children[0].children[0].operator, u'where')
+        expected = query.to_list()
+        del calls[:]
+        self.assertListEqual(optimized.execute().to_list(), expected)
+        self.assertEqual(len(calls), len(expected))
+
+    def test_collapse_takes(self):
+        for a, b in [(3, 7), (7, 3), (0, 2), (4, 4)]:
+            query = Enumerable(self.rows).take(a).take(b)
+            optimized = query.plan().optimize([collapse_takes])
+            self.assertIsInstance(optimized.children[0], Source)
+            self.assertEqual(optimized.argument, min(a, b))
+            self.assertListEqual(optimized.execute().to_list(), query.to_list())
+
+    def test_first_of_order_by_to_min(self):
+        for query in [
+            Enumerable(self.rows).order_by(lambda r: r['score']),
+            Enumerable(self.rows).order_by_descending(lambda r: r['score']),
+            Enumerable(self.rows).order_by(lambda r: r['score'])
+                .then_by_descending(lambda r: r['group']),
+        ]:
+            plan = query.plan().first()
+            optimized = plan.optimize([first_of_order_by_to_min])
+            self.assertIsInstance(optimized, MinBy)
+            self.assertIs(optimized.execute(), plan.execute())
+            self.assertIs(optimized.execute(), query.first())
+        empty = Enumerable([]).order_by(lambda x: x).plan().first()
+        self.assertRaises(
+            NoElementsError, empty.optimize([first_of_order_by_to_min]).execute)
+
+    def test_count_greater_than_zero_to_any(self):
+        for data in [[], self.rows]:
+            count = Enumerable(data).where(lambda r: r['group'] == 3).plan().count()
+            for plan in [count > 0, count >= 1, count != 0, 0 < count]:
+                self.assertIsInstance(plan, Compare)
+                optimized = plan.optimize([count_greater_than_zero_to_any])
+                self.assertIsInstance(optimized, Any)
+                self.assertEqual(optimized.execute(), plan.execute())
+            self.assertIsInstance((count > 1).optimize(), Compare)
+
+    def test_any_stops_reading(self):
+        read = []
+
+        def source():
+            for row in self.rows:
+                read.append(row)
+                yield row
+
+        plan = Enumerable(source(), cache_policy=u'none').plan().count() > 0
+        self.assertTrue(plan.optimize().execute())
+        self.assertEqual(len(read), 1)
+
+    def test_optimize(self):
+        query = Enumerable(self.rows).order_by(lambda r: r['score']) \
+            .where(lambda r: r['group'] != 0).take(20).take(10)
+        optimized = query.plan().optimize()
+        self.assertEqual(
+            [line.strip().split(u'(')[0] for line in optimized.explain().split(u'\n')],
+            [u'Take', u'OrderBy', u'Where', u'Source'])
+        self.assertListEqual(query.optimize().to_list(), query.to_list())
+        query = Enumerable(self.rows).order_by(lambda r: r['score']) \
+            .where(lambda r: r['group'] != 0)
+        plan = query.plan().first().optimize()
+        self.assertIsInstance(plan, MinBy)
+        self.assertIsInstance(plan.children[0], Stage)
+        self.assertIs(plan.execute(), query.first())
+
+    def test_custom_rules(self):
+        def drop_select(node):
+            if isinstance(node, Stage) and node.operator == u'select':
+                return node.children[0]
+            return None
+
+        query = Enumerable([1, 2, 3]).select(lambda x: x * 2).select(str)
+        self.assertListEqual(query.optimize([drop_select]).to_list(), [1, 2, 3])
+        self.assertIsInstance(
+            query.plan().count().optimize([drop_select]), Count)
+        self.assertIsInstance(Enumerable([1]).plan().first(), First)
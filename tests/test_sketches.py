@@ -0,0 +1,135 @@
+import bisect
+import math
+import random
+from unittest import TestCase, skipIf
+from py_linq import Enumerable
+from py_linq.exceptions import NoElementsError
+from py_linq.sketches import HyperLogLog, TDigest, numpy
+
+
+class TestTDigest(TestCase):
+    def setUp(self):
+        rng = random.Random(11)
+        self.values = [rng.gauss(0, 1) for _ in range(20000)]
+        self.ordered = sorted(self.values)
+
+    def rank_error(self, value, q):
+        return abs(bisect.bisect_left(self.ordered, value) / float(len(self.ordered)) - q)
+
+    def test_error_bounds(self):
+        enumerable = Enumerable(self.values)
+        for q in [0.001, 0.01, 0.1, 0.5, 0.9, 0.99, 0.999]:
+            bound = math.pi * math.sqrt(q * (1 - q)) / 100
+            self.assertLessEqual(
+                self.rank_error(enumerable.approx_quantile(q), q),
+                bound,
+                u"Rank error of quantile {0} exceeds documented bound".format(q))
+
+    def test_against_median(self):
+        enumerable = Enumerable(self.values)
+        median = enumerable.median()
+        approx = Enumerable(x for x in self.values).approx_quantile(0.5)
+        spread = self.ordered[len(self.ordered) // 2 + 200] - \
+            self.ordered[len(self.ordered) // 2 - 200]
+        self.assertLessEqual(
+            abs(approx - median),
+            spread,
+            u"Approximate median should be within 1% rank of the median")
+
+    def test_merge(self):
+        half = len(self.values) // 2
+        left = Enumerable(self.values[:half]).to_tdigest()
+        right = Enumerable(self.values[half:]).to_tdigest()
+        merged = left.merge(right)
+        self.assertEqual(merged.count, len(self.values))
+        self.assertEqual(merged.min, self.ordered[0])
+        self.assertEqual(merged.max, self.ordered[-1])
+        self.assertLessEqual(self.rank_error(merged.quantile(0.5), 0.5), 0.0157)
+        self.assertLessEqual(
+            len(merged.centroids()),
+            100,
+            u"Merged sketch should stay bounded")
+
+    def test_uncached_source(self):
+        source = Enumerable(
+            (x for x in self.values), cache_policy='none')
+        scaled = source.select(lambda x: x * 2)
+        digest = scaled.to_tdigest()
+        self.assertEqual(digest.count, len(self.values))
+        self.assertLessEqual(len(digest.centroids()), 100)
+        self.assertIsNone(source._memo, u"Source should not be memoized")
+        self.assertIsNone(scaled._memo, u"Chain should not be memoized")
+        for query in [
+            lambda e: e.approx_quantile(0.5),
+            lambda e: e.approx_percentiles([50]),
+        ]:
+            enumerable = Enumerable(
+                (x for x in self.values), cache_policy='none')
+            query(enumerable)
+            self.assertIsNone(enumerable._memo)
+
+    def test_small_and_invalid(self):
+        self.assertRaises(NoElementsError, Enumerable([]).approx_quantile, 0.5)
+        self.assertRaises(ValueError, Enumerable([1]).approx_quantile, 2)
+        self.assertRaises(ValueError, Enumerable([1]).approx_percentiles, [101])
+        self.assertRaises(ValueError, TDigest, 0)
+        self.assertListEqual(
+            Enumerable([1, 2, 3]).approx_percentiles([0, 50, 100]),
+            [1, 2, 3])
+        self.assertEqual(
+            Enumerable([{'value': 5}]).approx_quantile(0.3, lambda x: x['value']),
+            5)
+
+
+class TestHyperLogLog(TestCase):
+    def assertClose(self, estimate, actual, precision=14):
+        error = 3 * 1.04 / math.sqrt(2 ** precision)
+        self.assertLessEqual(
+            abs(estimate - actual),
+            error * actual,
+            u"Estimate {0} is not within 3 standard errors of {1}".format(
+                estimate, actual))
+
+    def test_count_distinct(self):
+        self.assertEqual(Enumerable([]).approx_count_distinct(), 0)
+        self.assertEqual(Enumerable([1, 1, 2, 2, 3]).approx_count_distinct(), 3)
+        users = Enumerable(
+            {'user': u"user{0}".format(i % 50000)} for i in range(150000))
+        self.assertClose(
+            users.approx_count_distinct(lambda x: x['user']),
+            50000)
+        self.assertClose(
+            Enumerable(range(100000)).approx_count_distinct(precision=10),
+            100000,
+            precision=10)
+
+    def test_merge(self):
+        left = Enumerable(range(0, 60000)).to_hyperloglog(use_numpy=False)
+        right = Enumerable(range(40000, 100000)).to_hyperloglog(use_numpy=False)
+        self.assertClose(left.merge(right).count(), 100000)
+        self.assertRaises(ValueError, left.merge, HyperLogLog(10))
+        self.assertRaises(TypeError, left.merge, TDigest())
+        self.assertRaises(ValueError, HyperLogLog, 3)
+
+    def test_uncached_source(self):
+        source = Enumerable(
+            (i % 5000 for i in range(50000)), cache_policy='none')
+        keys = source.select(lambda x: x * 2)
+        self.assertClose(keys.to_hyperloglog(use_numpy=False).count(), 5000)
+        self.assertIsNone(source._memo, u"Source should not be memoized")
+        self.assertIsNone(keys._memo, u"Chain should not be memoized")
+        enumerable = Enumerable(
+            (u"user{0}".format(i) for i in range(1000)), cache_policy='none')
+        self.assertClose(enumerable.approx_count_distinct(), 1000)
+        self.assertIsNone(enumerable._memo)
+
+    @skipIf(numpy is None, u"NumPy is not installed")
+    def test_numpy_matches_pure_python(self):
+        keys = list(range(-50000, 50000)) + [2 ** 63 + 1, u"a", 2.0]
+        pure = Enumerable(keys).to_hyperloglog(use_numpy=False)
+        vectorized = Enumerable(keys).to_hyperloglog(use_numpy=True)
+        self.assertEqual(pure.count(), vectorized.count())
+        self.assertEqual(
+            pure.merge(vectorized).count(),
+            pure.count(),
+            u"Sketches from both hashing paths should merge")